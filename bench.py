@@ -0,0 +1,753 @@
+import argparse
+import asyncio
+import collections
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import discord
+from aiohttp import web
+
+import main as clonebot
+
+BENCH_HOST = "127.0.0.1"
+RESULTS_DIR = "bench_results"
+API_PREFIX = "/api/v10"
+SCENARIOS = ("clone", "purge", "resume")
+SIZES = {
+    "small": {"roles": 20, "categories": 3, "text_channels": 12, "voice_channels": 3,
+              "messages": 25, "attachment_every": 5, "members": 50},
+    "medium": {"roles": 60, "categories": 8, "text_channels": 40, "voice_channels": 8,
+               "messages": 100, "attachment_every": 10, "members": 500},
+    "large": {"roles": 200, "categories": 20, "text_channels": 150, "voice_channels": 30,
+              "messages": 500, "attachment_every": 10, "members": 5000},
+}
+ATTACHMENT_SIZES = (8 * 1024, 64 * 1024, 256 * 1024)
+# (requests, window seconds) per route, roughly what Discord hands out to a bot
+DEFAULT_RATE_LIMIT = (5, 5.0)
+RATE_LIMITS = {
+    "POST /guilds/{guild_id}/roles": (10, 10.0),
+    "POST /guilds/{guild_id}/channels": (10, 10.0),
+    "PATCH /guilds/{guild_id}/members/{user_id}": (10, 10.0),
+    "DELETE /guilds/{guild_id}/roles/{role_id}": (10, 10.0),
+    "GET /guilds/{guild_id}/members": (10, 10.0),
+    "POST /webhooks/{webhook_id}/{token}": (5, 2.0),
+}
+GLOBAL_RATE_LIMIT = 50
+MUTATING_METHODS = ("POST", "PATCH", "PUT", "DELETE")
+
+def snowflake_ids(start):
+    return itertools.count(start)
+
+def iso_now():
+    return datetime.now(timezone.utc).isoformat()
+
+def user_payload(user_id, name, bot=False):
+    return {"id": str(user_id), "username": name, "discriminator": "0", "global_name": name,
+            "avatar": None, "bot": bot, "public_flags": 0}
+
+def json_response(data, status=200, headers=None):
+    # discord.py only decodes bodies whose content type is exactly application/json
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers,
+                        content_type="application/json")
+
+def member_payload(user, roles):
+    return {"user": user, "roles": [str(role_id) for role_id in roles], "joined_at": iso_now(),
+            "deaf": False, "mute": False, "flags": 0}
+
+class FakeDiscord:
+    def __init__(self, time_scale=1.0, latency=0.04, jitter=0.02, shared_429_rate=0.0, seed=0):
+        self.time_scale = time_scale
+        self.latency = latency
+        self.jitter = jitter
+        self.shared_429_rate = shared_429_rate
+        self.random = random.Random(seed)
+        self.ids = snowflake_ids(900000000000000000)
+        self.bot_user = user_payload(next(self.ids), "CloneBot Bench", bot=True)
+        self.guilds = {}
+        self.channel_guilds = {}
+        self.buckets = {}
+        self.global_window = collections.deque()
+        self.requests = collections.Counter()
+        self.statuses = collections.Counter()
+        self.runner = None
+        self.url = None
+
+    def app(self):
+        app = web.Application(middlewares=[self.rate_limit], client_max_size=64 * 1024 * 1024)
+        app.router.add_get(API_PREFIX + "/users/@me", self.get_me)
+        app.router.add_get(API_PREFIX + "/oauth2/applications/@me", self.get_application)
+        app.router.add_get(API_PREFIX + "/guilds/{guild_id}", self.get_guild)
+        app.router.add_get(API_PREFIX + "/guilds/{guild_id}/channels", self.get_channels)
+        app.router.add_get(API_PREFIX + "/guilds/{guild_id}/members", self.get_members)
+        app.router.add_post(API_PREFIX + "/guilds/{guild_id}/roles", self.create_role)
+        app.router.add_patch(API_PREFIX + "/guilds/{guild_id}/roles", self.move_roles)
+        app.router.add_delete(API_PREFIX + "/guilds/{guild_id}/roles/{role_id}", self.delete_role)
+        app.router.add_post(API_PREFIX + "/guilds/{guild_id}/channels", self.create_channel)
+        app.router.add_patch(API_PREFIX + "/guilds/{guild_id}/channels", self.move_channels)
+        app.router.add_patch(API_PREFIX + "/guilds/{guild_id}/members/{user_id}", self.edit_member)
+        app.router.add_delete(API_PREFIX + "/channels/{channel_id}", self.delete_channel)
+        app.router.add_post(API_PREFIX + "/channels/{channel_id}/messages", self.create_message)
+        app.router.add_post("/api/webhooks/{webhook_id}/{token}", self.execute_webhook)
+        app.router.add_get("/attachments/{attachment_id}/{filename}", self.get_attachment)
+        return app
+
+    async def start(self, port=0):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, BENCH_HOST, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://{BENCH_HOST}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    def reset_stats(self):
+        self.requests.clear()
+        self.statuses.clear()
+        self.buckets.clear()
+        self.global_window.clear()
+
+    def stats(self):
+        ops = sum(count for (route, status), count in self.statuses.items()
+                  if route.split(" ", 1)[0] in MUTATING_METHODS and "/webhooks/" not in route and status < 400)
+        return {
+            "total": sum(self.requests.values()),
+            "ops": ops,
+            "rate_limited": sum(count for (route, status), count in self.statuses.items() if status == 429),
+            "by_route": dict(sorted(self.requests.items())),
+        }
+
+    def route_of(self, request):
+        resource = request.match_info.route.resource
+        template = resource.canonical if resource else request.path
+        if template.startswith(API_PREFIX):
+            template = template[len(API_PREFIX):]
+        elif template.startswith("/api/"):
+            template = template[4:]
+        return f"{request.method} {template}"
+
+    def check_global(self, now):
+        window = self.time_scale
+        while self.global_window and self.global_window[0] <= now - window:
+            self.global_window.popleft()
+        if len(self.global_window) >= GLOBAL_RATE_LIMIT:
+            return self.global_window[0] + window - now
+        self.global_window.append(now)
+        return None
+
+    def limited(self, retry_after, scope, headers):
+        retry_after = max(retry_after, 0.001)
+        headers.update({
+            "Retry-After": f"{retry_after:.3f}",
+            "X-RateLimit-Scope": scope,
+            "Via": "1.1 google",
+        })
+        if scope == "global":
+            headers["X-RateLimit-Global"] = "true"
+        body = {"message": "You are being rate limited.", "retry_after": retry_after, "global": scope == "global"}
+        return json_response(body, status=429, headers=headers)
+
+    @web.middleware
+    async def rate_limit(self, request, handler):
+        route = self.route_of(request)
+        self.requests[route] += 1
+        await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+        if route.startswith("GET /attachments/"):
+            return await handler(request)
+
+        now = time.monotonic()
+        limit, window = RATE_LIMITS.get(route, DEFAULT_RATE_LIMIT)
+        window *= self.time_scale
+        major = next((request.match_info[key] for key in ("channel_id", "guild_id", "webhook_id")
+                      if key in request.match_info), "")
+        bucket_hash = hashlib.sha1(route.encode()).hexdigest()[:16]
+        headers = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Bucket": bucket_hash}
+
+        retry_after = self.check_global(now)
+        if retry_after is not None:
+            response = self.limited(retry_after, "global", headers)
+        elif self.shared_429_rate and self.random.random() < self.shared_429_rate:
+            response = self.limited(window / limit, "shared", headers)
+        else:
+            bucket = self.buckets.get((bucket_hash, major))
+            if bucket is None or bucket[1] <= now:
+                bucket = self.buckets[(bucket_hash, major)] = [limit, now + window]
+            headers["X-RateLimit-Reset-After"] = f"{bucket[1] - now:.3f}"
+            headers["X-RateLimit-Reset"] = f"{time.time() + bucket[1] - now:.3f}"
+            if bucket[0] <= 0:
+                headers["X-RateLimit-Remaining"] = "0"
+                response = self.limited(bucket[1] - now, "user", headers)
+            else:
+                bucket[0] -= 1
+                headers["X-RateLimit-Remaining"] = str(bucket[0])
+                response = await handler(request)
+                response.headers.update(headers)
+        self.statuses[(route, response.status)] += 1
+        return response
+
+    def create_guild(self, name, member_ids=(), structure=None):
+        guild_id = next(self.ids)
+        bot_role_id = next(self.ids)
+        guild = {
+            "id": guild_id,
+            "name": name,
+            "roles": {
+                guild_id: {"id": str(guild_id), "name": "@everyone", "permissions": "1071698660929",
+                           "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False},
+                bot_role_id: {"id": str(bot_role_id), "name": "CloneBot", "permissions": "8", "position": 1,
+                              "color": 0, "hoist": False, "managed": True, "mentionable": False,
+                              "tags": {"bot_id": self.bot_user["id"]}},
+            },
+            "channels": {},
+            "members": {},
+        }
+        self.guilds[guild_id] = guild
+        guild["members"][int(self.bot_user["id"])] = member_payload(self.bot_user, [bot_role_id])
+        for member_id in member_ids:
+            guild["members"][member_id] = member_payload(user_payload(member_id, f"member-{member_id}"), [])
+        if structure:
+            for i in range(structure["roles"]):
+                self.add_role(guild, {"name": f"role-{i}"})
+            categories = [self.add_channel(guild, {"name": f"category-{i}", "type": 4})
+                          for i in range(structure["categories"])]
+            for i in range(structure["text_channels"] + structure["voice_channels"]):
+                kind = 0 if i < structure["text_channels"] else 2
+                parent = categories[i % len(categories)]["id"] if categories else None
+                self.add_channel(guild, {"name": f"channel-{i}", "type": kind, "parent_id": parent})
+        return guild_id
+
+    def guild_or_404(self, request):
+        guild = self.guilds.get(int(request.match_info["guild_id"]))
+        if guild is None:
+            raise web.HTTPNotFound(body=json.dumps({"message": "Unknown Guild", "code": 10004}).encode(),
+                                   content_type="application/json")
+        return guild
+
+    def add_role(self, guild, payload):
+        for role in guild["roles"].values():
+            if role["position"] >= 1:
+                role["position"] += 1
+        role_id = next(self.ids)
+        role = guild["roles"][role_id] = {
+            "id": str(role_id),
+            "name": payload.get("name", "new role"),
+            "permissions": str(payload.get("permissions", "0")),
+            "color": payload.get("color", 0),
+            "hoist": payload.get("hoist", False),
+            "mentionable": payload.get("mentionable", False),
+            "managed": False,
+            "position": 1,
+        }
+        return role
+
+    def add_channel(self, guild, payload):
+        channel_id = next(self.ids)
+        kind = payload.get("type", 0)
+        channel = {
+            "id": str(channel_id),
+            "guild_id": str(guild["id"]),
+            "type": kind,
+            "name": payload.get("name", "channel"),
+            "position": payload.get("position", len(guild["channels"])),
+            "parent_id": payload.get("parent_id"),
+            "permission_overwrites": payload.get("permission_overwrites", []),
+            "nsfw": payload.get("nsfw", False),
+        }
+        if kind == 0:
+            channel.update(topic=payload.get("topic"), rate_limit_per_user=payload.get("rate_limit_per_user", 0),
+                           last_message_id=None)
+        elif kind == 2:
+            channel.update(bitrate=payload.get("bitrate") or 64000, user_limit=payload.get("user_limit") or 0,
+                           rtc_region=None)
+        guild["channels"][channel_id] = channel
+        self.channel_guilds[channel_id] = guild["id"]
+        return channel
+
+    async def get_me(self, request):
+        return json_response(dict(self.bot_user, verified=True, mfa_enabled=False, flags=0))
+
+    async def get_application(self, request):
+        return json_response({
+            "id": self.bot_user["id"], "name": self.bot_user["username"], "icon": None, "description": "",
+            "rpc_origins": [], "bot_public": False, "bot_require_code_grant": False,
+            "owner": user_payload(1, "owner"), "verify_key": "0" * 64, "flags": 0,
+        })
+
+    async def get_guild(self, request):
+        guild = self.guild_or_404(request)
+        return json_response({
+            "id": str(guild["id"]), "name": guild["name"], "owner_id": "1", "features": [],
+            "emojis": [], "stickers": [], "roles": list(guild["roles"].values()),
+            "member_count": len(guild["members"]), "approximate_member_count": len(guild["members"]),
+        })
+
+    async def get_channels(self, request):
+        return json_response(list(self.guild_or_404(request)["channels"].values()))
+
+    async def get_members(self, request):
+        guild = self.guild_or_404(request)
+        limit = min(int(request.query.get("limit", 1)), 1000)
+        after = int(request.query.get("after", 0))
+        members = [guild["members"][member_id] for member_id in sorted(guild["members"]) if member_id > after]
+        return json_response(members[:limit])
+
+    async def create_role(self, request):
+        guild = self.guild_or_404(request)
+        return json_response(self.add_role(guild, await request.json()))
+
+    async def move_roles(self, request):
+        guild = self.guild_or_404(request)
+        for entry in await request.json():
+            role = guild["roles"].get(int(entry["id"]))
+            if role is None:
+                return json_response({"message": "Unknown Role", "code": 10011}, status=404)
+            role["position"] = entry["position"]
+        return json_response(sorted(guild["roles"].values(), key=lambda role: role["position"]))
+
+    async def delete_role(self, request):
+        guild = self.guild_or_404(request)
+        if not guild["roles"].pop(int(request.match_info["role_id"]), None):
+            return json_response({"message": "Unknown Role", "code": 10011}, status=404)
+        return web.Response(status=204)
+
+    async def create_channel(self, request):
+        guild = self.guild_or_404(request)
+        return json_response(self.add_channel(guild, await request.json()))
+
+    async def move_channels(self, request):
+        guild = self.guild_or_404(request)
+        for entry in await request.json():
+            channel = guild["channels"].get(int(entry["id"]))
+            if channel is None:
+                return json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+            channel["position"] = entry["position"]
+            if "parent_id" in entry:
+                channel["parent_id"] = entry["parent_id"]
+        return web.Response(status=204)
+
+    async def edit_member(self, request):
+        guild = self.guild_or_404(request)
+        member = guild["members"].get(int(request.match_info["user_id"]))
+        if member is None:
+            return json_response({"message": "Unknown Member", "code": 10007}, status=404)
+        payload = await request.json()
+        if "roles" in payload:
+            member["roles"] = [str(role_id) for role_id in payload["roles"]]
+        return json_response(member)
+
+    async def delete_channel(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        guild = self.guilds.get(self.channel_guilds.pop(channel_id, None))
+        channel = guild["channels"].pop(channel_id, None) if guild else None
+        if channel is None:
+            return json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+        return json_response(channel)
+
+    async def create_message(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        if channel_id not in self.channel_guilds:
+            return json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+        payload = {}
+        attachments = []
+        if request.content_type.startswith("multipart/"):
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == "payload_json":
+                    payload = json.loads(await part.text())
+                else:
+                    size = len(await part.read())
+                    attachment_id = next(self.ids)
+                    attachments.append({
+                        "id": str(attachment_id), "filename": part.filename, "size": size,
+                        "url": f"{self.url}/attachments/{attachment_id}/{part.filename}?size={size}",
+                        "proxy_url": f"{self.url}/attachments/{attachment_id}/{part.filename}?size={size}",
+                    })
+        else:
+            payload = await request.json()
+        return json_response({
+            "id": str(next(self.ids)), "channel_id": str(channel_id), "type": 0,
+            "content": payload.get("content") or "", "author": self.bot_user,
+            "attachments": attachments, "embeds": payload.get("embeds") or [], "mentions": [],
+            "mention_roles": [], "mention_everyone": False, "pinned": False, "tts": False,
+            "timestamp": iso_now(), "edited_timestamp": None, "flags": 0, "components": [],
+        })
+
+    async def execute_webhook(self, request):
+        await request.read()
+        return web.Response(status=204)
+
+    async def get_attachment(self, request):
+        size = int(request.query.get("size", ATTACHMENT_SIZES[0]))
+        block = hashlib.sha256(request.match_info["attachment_id"].encode()).digest()
+        data = (block * (size // len(block) + 1))[:size]
+        return web.Response(body=data, content_type="application/octet-stream")
+
+def source_records(spec, ids):
+    guild_id = next(ids)
+    records = [{"type": "guild", "id": guild_id, "name": "Bench Source"}]
+    roles = [guild_id]
+    records.append({"type": "role", "id": guild_id, "name": "@everyone", "permissions": 1071698660929,
+                    "color": 0, "hoist": False, "mentionable": False, "position": 0, "managed": False,
+                    "default": True})
+    for i in range(spec["roles"]):
+        role_id = next(ids)
+        roles.append(role_id)
+        records.append({"type": "role", "id": role_id, "name": f"role-{i}", "permissions": 104324673,
+                        "color": (i * 2654435761) & 0xFFFFFF, "hoist": i % 5 == 0, "mentionable": i % 3 == 0,
+                        "position": i + 1, "managed": False, "default": False})
+
+    def overwrites(i):
+        if len(roles) < 2:
+            return []
+        return [{"id": roles[1 + i % (len(roles) - 1)], "kind": "role", "allow": 1024, "deny": 2048}]
+
+    categories = []
+    for i in range(spec["categories"]):
+        category_id = next(ids)
+        categories.append(category_id)
+        records.append({"type": "channel", "kind": "category", "id": category_id, "name": f"category-{i}",
+                        "category_id": None, "position": i, "overwrites": overwrites(i)})
+    text_channels = []
+    for i in range(spec["text_channels"] + spec["voice_channels"]):
+        channel_id = next(ids)
+        record = {"type": "channel", "id": channel_id, "name": f"channel-{i}", "position": i,
+                  "category_id": categories[i % len(categories)] if categories else None,
+                  "overwrites": overwrites(i)}
+        if i < spec["text_channels"]:
+            record.update(kind="text", topic=f"topic {i}", slowmode_delay=0)
+            text_channels.append(channel_id)
+        else:
+            record.update(kind="voice", bitrate=64000, user_limit=0)
+        records.append(record)
+    member_ids = []
+    for i in range(spec["members"]):
+        member_id = next(ids)
+        member_ids.append(member_id)
+        records.append({"type": "member", "id": member_id, "name": f"member-{i}",
+                        "roles": roles[1 + i % max(1, len(roles) - 1):][:2] if len(roles) > 1 else []})
+    return records, text_channels, member_ids
+
+def message_records(spec, ids, api_url, channel_id):
+    records = []
+    previous = None
+    for i in range(spec["messages"]):
+        message_id = next(ids)
+        record = {"type": "message", "id": message_id, "content": f"message {i} " + "lorem ipsum " * (i % 8),
+                  "embeds": [], "attachments": []}
+        if spec["attachment_every"] and i % spec["attachment_every"] == 0:
+            attachment_id = next(ids)
+            size = ATTACHMENT_SIZES[i % len(ATTACHMENT_SIZES)]
+            record["attachments"].append({
+                "id": attachment_id, "url": f"{api_url}/attachments/{attachment_id}/file-{i}.bin?size={size}",
+                "filename": f"file-{i}.bin", "spoiler": False, "size": size,
+            })
+        if previous and i % 7 == 0:
+            record["reference"] = {"channel_id": channel_id, "message_id": previous}
+        previous = message_id
+        records.append(record)
+    return records
+
+def generate_source(path, spec, api_url):
+    ids = snowflake_ids(100000000000000000)
+    records, text_channels, member_ids = source_records(spec, ids)
+    writer = clonebot.SnapshotWriter(path)
+    try:
+        writer.begin("structure")
+        writer.write(records)
+        writer.end()
+        for channel_id in text_channels:
+            messages = message_records(spec, ids, api_url, channel_id)
+            writer.begin(f"messages:{channel_id}")
+            for start in range(0, len(messages), clonebot.SNAPSHOT_BATCH_SIZE):
+                writer.write(messages[start:start + clonebot.SNAPSHOT_BATCH_SIZE])
+            writer.end()
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return member_ids
+
+def expected_steps(spec):
+    return (spec["roles"] + spec["categories"] + spec["text_channels"] + spec["voice_channels"]
+            + spec["text_channels"] * spec["messages"])
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def simulate_gateway():
+    # There is no gateway in the benchmark, so apply the cache updates the
+    # GUILD_ROLE_CREATE / CHANNEL_CREATE / *_DELETE events would have made.
+    def after(cls, name, apply):
+        original = getattr(cls, name)
+
+        async def wrapper(self, *args, **kwargs):
+            result = await original(self, *args, **kwargs)
+            apply(self, result)
+            return result
+        setattr(cls, name, wrapper)
+
+    after(discord.Guild, "create_role", lambda guild, role: guild._add_role(role))
+    for name in ("create_text_channel", "create_voice_channel", "create_category"):
+        after(discord.Guild, name, lambda guild, channel: guild._add_channel(channel))
+    after(discord.abc.GuildChannel, "delete", lambda channel, result: channel.guild._remove_channel(channel))
+    after(discord.Role, "delete", lambda role, result: role.guild._roles.pop(role.id, None))
+
+    async def query_members(self, query=None, *, limit=5, user_ids=None, presences=False, cache=True):
+        return [member for member in map(self.get_member, user_ids or []) if member]
+    discord.Guild.query_members = query_members
+
+async def fetch_guild(client, guild_id):
+    data = await client.http.get_guild(guild_id)
+    data["channels"] = await client.http.get_all_guild_channels(guild_id)
+    data["members"] = []
+    after = 0
+    while True:
+        page = await client.http.get_members(guild_id, 1000, after)
+        data["members"].extend(page)
+        if len(page) < 1000:
+            break
+        after = int(page[-1]["user"]["id"])
+    guild = discord.Guild(data=data, state=client._connection)
+    client._connection._add_guild(guild)
+    return guild
+
+async def bench_clone(client, args):
+    source = await clonebot.load_snapshot(args.snapshot)
+    target = await fetch_guild(client, args.target)
+    job = clonebot.Job("clone", source.name, [target])
+    progress = clonebot.CloneProgress(args.steps, clonebot.checkpoint_journal_for(f"{source.id}-{target.id}"))
+    job.targets.append((target, progress))
+    profiler = clonebot.start_job_profiler("bench-clone")
+    try:
+        await clonebot.job_scheduler.run(job, clonebot.clone_server(source, job.targets, [], profiler))
+    finally:
+        if profiler:
+            await profiler.stop()
+    return {"errors": len(progress.errors)}
+
+async def bench_resume(client, args):
+    source = await clonebot.load_snapshot(args.snapshot)
+    target = await fetch_guild(client, args.target)
+    journal = clonebot.checkpoint_journal_for(f"{source.id}-{target.id}")
+    job = clonebot.Job("clone", source.name, [target])
+    progress = clonebot.CloneProgress(args.steps, journal)
+    job.targets.append((target, progress))
+    task = asyncio.ensure_future(clonebot.job_scheduler.run(job, clonebot.clone_server(source, job.targets, [])))
+    while not task.done() and progress.current_step < args.steps * args.resume_at:
+        await asyncio.sleep(0.05)
+    job.cancel()
+    try:
+        await task
+    except Exception:
+        pass
+    await journal.flush()
+
+    target = await fetch_guild(client, args.target)
+    job = clonebot.Job("clone", source.name, [target])
+    progress = clonebot.CloneProgress(args.steps, journal)
+    progress.load(await clonebot.load_clone_progress(journal))
+    resumed_at = progress.get_progress_percent()
+    job.targets.append((target, progress))
+    await clonebot.job_scheduler.run(job, clonebot.clone_server(source, job.targets, []))
+    return {"errors": len(progress.errors), "resumed_at_percent": round(resumed_at, 1)}
+
+async def bench_purge(client, args):
+    guild = await fetch_guild(client, args.target)
+    channels = list(guild.channels)
+    roles = [role for role in guild.roles
+             if not role.is_default() and not role.managed and role < guild.me.top_role]
+    counts = collections.Counter()
+    await clonebot.purge_guild(guild, channels, roles, counts, len(channels) + len(roles))
+    return {"errors": counts["Failed"], "deleted": counts["Channels deleted"] + counts["Roles deleted"]}
+
+WORKERS = {"clone": bench_clone, "purge": bench_purge, "resume": bench_resume}
+
+async def run_worker(args):
+    discord.http.Route.BASE = args.api + API_PREFIX
+    clonebot.current_webhook_url = f"{args.api}/api/webhooks/0/bench"
+    clonebot.logger.setLevel(logging.DEBUG if args.verbose else logging.ERROR)
+    clonebot.request_scheduler.set_max_in_flight(args.max_in_flight)
+    simulate_gateway()
+    client = discord.Client(**clonebot.cache_options("full"), http_trace=clonebot.request_scheduler.trace_config())
+    await client.login("bench")
+    try:
+        started = time.perf_counter()
+        result = await WORKERS[args.worker](client, args)
+        result["wall_time"] = time.perf_counter() - started
+    finally:
+        await clonebot.webhook_sink.close()
+        await clonebot.attachment_cache.close()
+        await client.close()
+    result.update(
+        peak_rss_mb=peak_rss_mb(),
+        client_rate_limited=clonebot.request_scheduler.rate_limited,
+        client_retry_after_seconds=round(clonebot.request_scheduler.retry_after_total, 3),
+        attachment_bytes=clonebot.attachment_cache.bytes_downloaded,
+    )
+    with open(args.result, "w") as f:
+        json.dump(result, f)
+
+async def run_scenario(fake, scenario, args, workdir, snapshot, member_ids, spec):
+    fake.reset_stats()
+    structure = spec if scenario == "purge" else None
+    target_id = fake.create_guild(f"Bench {scenario}", member_ids, structure)
+    scenario_dir = os.path.join(workdir, scenario)
+    os.makedirs(scenario_dir, exist_ok=True)
+    result_path = os.path.join(scenario_dir, "result.json")
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker", scenario, "--api", fake.url,
+        "--snapshot", snapshot, "--target", str(target_id), "--result", result_path,
+        "--max-in-flight", str(args.max_in_flight), "--steps", str(expected_steps(spec)),
+        "--resume-at", str(args.resume_at),
+    ]
+    if args.verbose:
+        command.append("--verbose")
+    output = None if args.verbose else asyncio.subprocess.DEVNULL
+    env = dict(os.environ)
+    env.pop(clonebot.PROFILE_ENV, None)
+    if args.profile and scenario == "clone":
+        env[clonebot.PROFILE_ENV] = args.profile
+    process = await asyncio.create_subprocess_exec(*command, cwd=scenario_dir, stdout=output, stderr=output, env=env)
+    await process.wait()
+    if process.returncode != 0 or not os.path.exists(result_path):
+        return {"failed": True, "returncode": process.returncode, "requests": fake.stats()}
+    with open(result_path) as f:
+        result = json.load(f)
+    result["requests"] = fake.stats()
+    result["ops_per_sec"] = result["requests"]["ops"] / result["wall_time"] if result["wall_time"] else 0.0
+    return result
+
+def previous_results(size):
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    names = sorted(name for name in os.listdir(RESULTS_DIR) if name.endswith(f"-{size}.json"))
+    if not names:
+        return None
+    with open(os.path.join(RESULTS_DIR, names[-1])) as f:
+        return json.load(f)
+
+def format_change(current, previous, lower_is_better):
+    if current is None or not previous:
+        return ""
+    change = (current - previous) / previous * 100
+    better = change < 0 if lower_is_better else change > 0
+    return f" ({change:+.1f}% {'better' if better else 'worse'})" if abs(change) >= 0.05 else " (=)"
+
+def print_report(report, previous):
+    print(f"\nCloneBot benchmark - size {report['size']}, time scale {report['config']['time_scale']}, "
+          f"max_in_flight {report['config']['max_in_flight']}")
+    for scenario, result in report["scenarios"].items():
+        print("=" * 80)
+        if result.get("failed"):
+            print(f"{scenario:<8} FAILED (exit code {result['returncode']})")
+            continue
+        before = ((previous or {}).get("scenarios") or {}).get(scenario) or {}
+        if before.get("failed"):
+            before = {}
+        requests = result["requests"]
+        print(f"{scenario:<8} wall {result['wall_time']:.2f}s"
+              f"{format_change(result['wall_time'], before.get('wall_time'), True)}")
+        print(f"         ops/sec {result['ops_per_sec']:.2f}"
+              f"{format_change(result['ops_per_sec'], before.get('ops_per_sec'), False)}")
+        if result.get("peak_rss_mb") is not None:
+            print(f"         peak RSS {result['peak_rss_mb']:.1f} MB"
+                  f"{format_change(result['peak_rss_mb'], before.get('peak_rss_mb'), True)}")
+        print(f"         requests {requests['total']} (ops {requests['ops']}, 429s {requests['rate_limited']})"
+              f"{format_change(requests['total'], (before.get('requests') or {}).get('total'), True)}")
+        print(f"         errors {result['errors']}"
+              + (f", resumed at {result['resumed_at_percent']}%" if "resumed_at_percent" in result else ""))
+    print("=" * 80)
+
+async def run_benchmarks(args):
+    spec = dict(SIZES[args.size])
+    for key in spec:
+        value = getattr(args, key)
+        if value is not None:
+            spec[key] = value
+    workdir = tempfile.mkdtemp(prefix="clonebot-bench-")
+    fake = FakeDiscord(args.time_scale, args.latency / 1000, args.jitter / 1000, args.shared_429_rate, args.seed)
+    await fake.start(args.port)
+    try:
+        snapshot = os.path.join(workdir, "source.cbsnap")
+        member_ids = await asyncio.to_thread(generate_source, snapshot, spec, fake.url)
+        report = {
+            "size": args.size,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "spec": spec,
+            "config": {"time_scale": args.time_scale, "latency_ms": args.latency, "jitter_ms": args.jitter,
+                       "shared_429_rate": args.shared_429_rate, "max_in_flight": args.max_in_flight},
+            "scenarios": {},
+        }
+        for scenario in args.scenarios:
+            print(f"Running {scenario}...")
+            report["scenarios"][scenario] = await run_scenario(
+                fake, scenario, args, workdir, snapshot, member_ids, spec)
+    finally:
+        await fake.stop()
+        if args.keep or args.profile:
+            print(f"Work directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    previous = previous_results(args.size)
+    print_report(report, previous)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.size}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results saved to {path}")
+    return all(not result.get("failed") for result in report["scenarios"].values())
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark CloneBot against a local fake Discord API")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    for key in SIZES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=int, default=None,
+                            help=f"override the size preset's {key.replace('_', ' ')}")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="multiply every rate-limit window by this (e.g. 0.1 for quick runs)")
+    parser.add_argument("--latency", type=float, default=40.0, help="mean API latency in ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="API latency standard deviation in ms")
+    parser.add_argument("--shared-429-rate", type=float, default=0.0,
+                        help="fraction of requests answered with a shared-scope 429")
+    parser.add_argument("--max-in-flight", type=int, default=clonebot.DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--resume-at", type=float, default=0.5,
+                        help="fraction of the clone to finish before the resume scenario cancels it")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the temporary work directory")
+    parser.add_argument("--profile", choices=clonebot.PROFILE_MODES,
+                        help="profile the clone scenario into <work directory>/clone/profiles")
+    parser.add_argument("--verbose", action="store_true", help="show bot output from each scenario")
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--api", help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", help=argparse.SUPPRESS)
+    parser.add_argument("--target", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--steps", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.worker:
+        asyncio.run(run_worker(args))
+    else:
+        sys.exit(0 if asyncio.run(run_benchmarks(args)) else 1)
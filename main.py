@@ -9,21 +9,88 @@ from datetime import datetime, timezone
 import aiohttp
 import json
 from discord.ext import commands
-from tqdm import tqdm
 import time
+import sys
+import queue
+import logging
+import logging.handlers
+import threading
+import contextlib
+import collections
+import hashlib
+import uuid
+import gzip
+import cProfile
+import contextvars
+import argparse
+import concurrent.futures
 
 colorama.init(autoreset=True)
 
 DEFAULT_WEBHOOK_URL = "ur webhook url to log stuff"
+BOT_TOKEN = "ur bot token"
 LOGS_FILE = "logs.json"
 CONFIG_FILE = "config.json"
-PROGRESS_FILE = "progress.json"
+PROGRESS_FILE = "progress-{}.jsonl"
+CHECKPOINT_FLUSH_INTERVAL = 2.0
+CHECKPOINT_FLUSH_COUNT = 50
+DEFAULT_MAX_IN_FLIGHT = 8
+GLOBAL_RATE_LIMIT = 50
+MAJOR_PARAMETERS = ("channels", "guilds", "webhooks")
+WEBHOOK_BATCH_SIZE = 10
+WEBHOOK_QUEUE_SIZE = 200
+ATTACHMENT_CACHE_DIR = "attachment_cache"
+DEFAULT_ATTACHMENT_CACHE_MB = 1024
+MESSAGE_QUEUE_SIZE = 50
+DEFAULT_MESSAGE_HISTORY = 500
+REPLY_WINDOW = 1000
+CHECKPOINT_COMPACT_MESSAGES = 1000
+MEMBER_CHUNK_SIZE = 100
+PURGE_RETRIES = 3
+PURGE_UPDATE_INTERVAL = 2.0
+ATTACHMENT_DOWNLOADS = 4
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+MIRROR_FILE = "mirror-{}-{}.json"
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH_SIZE = 100
+SNAPSHOT_FOOTER = b'{"type":"footer","index":%20d}\n'
+DEFAULT_LOG_LEVEL = "INFO"
+RENDER_INTERVAL = 0.25
+PIPED_RENDER_INTERVAL = 10.0
+METRICS_HOST = "127.0.0.1"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROFILE_DIR = "profiles"
+PROFILE_ENV = "CLONEBOT_PROFILE"
+PROFILE_MODES = ("cprofile", "sampling")
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_TASK_INTERVAL = 0.1
+PROFILE_TOP = 40
+COMMAND_SYNC_FILE = "command_sync.json"
+COORDINATOR_HOST = "127.0.0.1"
+DEFAULT_COORDINATOR_PORT = 9473
+COORDINATOR_SYNC_INTERVAL = 1.0
+WORKER_RESTART_DELAY = 5.0
+CPU_WORKERS = 2
+CACHE_PROFILES = ("lean", "full")
 
 user_source_guilds = {}
-cloning_tasks = {}
-cancel_flag = False
 last_command_time = 0
 current_webhook_url = DEFAULT_WEBHOOK_URL
+max_in_flight = DEFAULT_MAX_IN_FLIGHT
+attachment_cache_mb = DEFAULT_ATTACHMENT_CACHE_MB
+log_level = DEFAULT_LOG_LEVEL
+metrics_port = None
+dev_guild_id = None
+shard_count = 1
+worker_processes = 1
+coordinator_port = DEFAULT_COORDINATOR_PORT
+worker_index = None
+coordinator = None
+cpu_pool = None
+cache_profile = CACHE_PROFILES[0]
+message_history_limit = DEFAULT_MESSAGE_HISTORY
+profile_next_clone = None
 bot_owner = "future4l"
 last_command_name = "None"
 
@@ -31,7 +98,6 @@ def clear_terminal():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def print_ascii_header():
-    clear_terminal()
     header_lines = [
         "       _                    _           _   ",
         "      | |                  | |         | |  ",
@@ -45,41 +111,219 @@ def print_ascii_header():
     ]
     colors = [Fore.RED, Fore.YELLOW, Fore.GREEN, Fore.CYAN, Fore.BLUE, Fore.MAGENTA]
     color_cycle = itertools.cycle(colors)
-    for line in header_lines:
-        colored_line = ''.join([next(color_cycle) + ch for ch in line])
-        print(colored_line)
-    print(Style.RESET_ALL)
-
-def log_action(action, status, details="", color=Fore.WHITE):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    separator = "=" * 80
-    action_line = f"[{timestamp}] {action.upper():<20} [{status}]"
-    details_lines = [f"    {line}" for line in details.split('\n') if line.strip()]
-    
-    print(separator)
-    print(color + action_line)
-    if details:
-        print(color + '\n'.join(details_lines))
-    print(separator + Style.RESET_ALL)
-
-print_ascii_header()
+    colored_lines = [''.join([next(color_cycle) + ch for ch in line]) for line in header_lines]
+    console_writer.queue.put(("header", "\n".join(colored_lines) + "\n" + Style.RESET_ALL + "\n"))
+
+class ConsoleWriter(threading.Thread):
+    def __init__(self, stream):
+        super().__init__(name="console-writer", daemon=True)
+        self.stream = stream
+        self.queue = queue.SimpleQueue()
+        self.interactive = stream.isatty()
+        self.formatter = logging.Formatter()
+        self.frame = []
+
+    def clear_frame(self):
+        if self.interactive and self.frame:
+            self.stream.write("\033[F\033[K" * len(self.frame))
+
+    def draw_frame(self):
+        if self.frame:
+            self.stream.write("\n".join(self.frame) + "\n")
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if isinstance(item, logging.LogRecord):
+                self.clear_frame()
+                self.stream.write(self.formatter.format(item) + "\n")
+                if self.interactive:
+                    self.draw_frame()
+            elif isinstance(item, tuple):
+                self.stream.flush()
+                clear_terminal()
+                self.stream.write(item[1])
+                if self.interactive:
+                    self.draw_frame()
+            else:
+                self.clear_frame()
+                self.frame = item
+                self.draw_frame()
+                if not self.interactive:
+                    self.frame = []
+            self.stream.flush()
+
+    def stop(self, timeout=2):
+        self.queue.put(None)
+        self.join(timeout)
+
+class BannerFormatter(logging.Formatter):
+    def format(self, record):
+        timestamp = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S")
+        separator = "=" * 80
+        color = getattr(record, "color", Fore.WHITE)
+        lines = [separator, color + f"[{timestamp}] {record.action.upper():<20} [{record.status}]"]
+        details_lines = [f"    {line}" for line in record.details.split('\n') if line.strip()]
+        if details_lines:
+            lines.append(color + '\n'.join(details_lines))
+        lines.append(separator + Style.RESET_ALL)
+        return "\n".join(lines)
+
+class ConsoleQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        return record
+
+console_writer = ConsoleWriter(sys.stdout)
+console_writer.formatter = BannerFormatter()
+console_writer.start()
+logger = logging.getLogger("clonebot")
+logger.propagate = False
+logger.setLevel(DEFAULT_LOG_LEVEL)
+console_handler = ConsoleQueueHandler(console_writer.queue)
+logger.addHandler(console_handler)
+
+def log_action(action, status, details="", color=Fore.WHITE, level=None):
+    if level is None:
+        level = {Fore.RED: logging.ERROR, Fore.YELLOW: logging.WARNING}.get(color, logging.INFO)
+    if logger.isEnabledFor(level):
+        logger.log(level, action, extra={"action": action, "status": status, "details": details, "color": color})
+
+class ProgressRenderer:
+    def __init__(self, interactive):
+        self.interval = RENDER_INTERVAL if interactive else PIPED_RENDER_INTERVAL
+        self.bars = {}
+        self.dirty = False
+        self.task = None
+
+    def update(self, key, done, total, suffix, length, fill):
+        self.bars[key] = (done, total, suffix, length, fill)
+        self.wake()
+
+    def finish(self, key):
+        if self.bars.pop(key, None) is not None:
+            self.wake()
+
+    def wake(self):
+        self.dirty = True
+        if self.task is None or self.task.done():
+            try:
+                self.task = asyncio.get_running_loop().create_task(self.run())
+            except RuntimeError:
+                pass
+
+    def render(self):
+        gold_color = "\033[38;2;255;215;0m"
+        reset_color = "\033[0m"
+        lines = []
+        for key, (done, total, suffix, length, fill) in self.bars.items():
+            ratio = min(done / total, 1.0) if total else 1.0
+            filled_length = int(length * ratio)
+            bar = fill * filled_length + '-' * (length - filled_length)
+            lines.append(f"{gold_color}{key[:40].ljust(40)} ╟{bar}╢ {100 * ratio:6.1f}% {suffix[:30]}{reset_color}")
+        return lines
+
+    async def run(self):
+        while self.dirty:
+            self.dirty = False
+            console_writer.queue.put(self.render())
+            for key, (done, total, *rest) in list(self.bars.items()):
+                if done >= total:
+                    del self.bars[key]
+                    self.dirty = True
+            await asyncio.sleep(self.interval)
+        console_writer.queue.put(self.render())
+
+progress_renderer = ProgressRenderer(console_writer.interactive)
 
 def load_config():
-    global current_webhook_url
+    global current_webhook_url, max_in_flight, attachment_cache_mb, log_level, metrics_port, message_history_limit, dev_guild_id
+    global shard_count, worker_processes, coordinator_port, cache_profile
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, "r") as f:
             config = json.load(f)
             current_webhook_url = config.get("webhook_url", DEFAULT_WEBHOOK_URL)
-            log_action("Config Loaded", "SUCCESS", f"Webhook URL: {current_webhook_url[:30]}...")
+            max_in_flight = max(1, int(config.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT)))
+            attachment_cache_mb = max(1, int(config.get("attachment_cache_mb", DEFAULT_ATTACHMENT_CACHE_MB)))
+            log_level = str(config.get("log_level", DEFAULT_LOG_LEVEL)).upper()
+            metrics_port = config.get("metrics_port")
+            dev_guild_id = config.get("dev_guild_id")
+            shards = config.get("shard_count", 1)
+            shard_count = None if shards == "auto" else max(1, int(shards))
+            worker_processes = min(GLOBAL_RATE_LIMIT, max(1, int(config.get("worker_processes", 1))))
+            coordinator_port = int(config.get("coordinator_port", DEFAULT_COORDINATOR_PORT))
+            cache_profile = config.get("cache_profile", CACHE_PROFILES[0])
+            if cache_profile not in CACHE_PROFILES:
+                cache_profile = CACHE_PROFILES[0]
+            message_history_limit = max(0, int(config.get("message_history_limit", DEFAULT_MESSAGE_HISTORY) or 0)) or None
+            log_action("Config Loaded", "SUCCESS", 
+                      f"Webhook URL: {current_webhook_url[:30]}...\nMax in-flight requests: {max_in_flight}")
     else:
         current_webhook_url = DEFAULT_WEBHOOK_URL
+        max_in_flight = DEFAULT_MAX_IN_FLIGHT
+        attachment_cache_mb = DEFAULT_ATTACHMENT_CACHE_MB
+        log_level = DEFAULT_LOG_LEVEL
+        metrics_port = None
+        dev_guild_id = None
+        shard_count = 1
+        worker_processes = 1
+        coordinator_port = DEFAULT_COORDINATOR_PORT
+        cache_profile = CACHE_PROFILES[0]
+        message_history_limit = DEFAULT_MESSAGE_HISTORY
         log_action("Config Load", "DEFAULT", "Using default webhook URL")
+    request_scheduler.set_max_in_flight(max_in_flight)
+    attachment_cache.limit = attachment_cache_mb * 1024 * 1024
+    logger.setLevel(log_level)
 
 def save_config():
     with open(CONFIG_FILE, "w") as f:
-        json.dump({"webhook_url": current_webhook_url}, f, indent=4)
+        json.dump({
+            "webhook_url": current_webhook_url,
+            "max_in_flight": max_in_flight,
+            "attachment_cache_mb": attachment_cache_mb,
+            "log_level": log_level,
+            "metrics_port": metrics_port,
+            "dev_guild_id": dev_guild_id,
+            "shard_count": shard_count or "auto",
+            "worker_processes": worker_processes,
+            "coordinator_port": coordinator_port,
+            "cache_profile": cache_profile,
+            "message_history_limit": message_history_limit or 0
+        }, f, indent=4)
     log_action("Config Saved", "SUCCESS", f"Webhook URL saved")
 
+def start_cpu_pool():
+    global cpu_pool
+    if cpu_pool is None:
+        cpu_pool = concurrent.futures.ProcessPoolExecutor(CPU_WORKERS)
+
+async def run_cpu(func, *args):
+    if cpu_pool is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, func, *args)
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(ATTACHMENT_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def command_fingerprint(tree, guild=None):
+    commands = sorted((command.to_dict() for command in tree.get_commands(guild=guild)), key=lambda command: command["name"])
+    return hashlib.sha256(json.dumps(commands, sort_keys=True).encode()).hexdigest()
+
+def load_command_fingerprints():
+    if os.path.exists(COMMAND_SYNC_FILE):
+        with open(COMMAND_SYNC_FILE, "r") as f:
+            return json.load(f)
+    return {}
+
+def save_command_fingerprints(fingerprints):
+    with open(COMMAND_SYNC_FILE, "w") as f:
+        json.dump(fingerprints, f, indent=4)
+
 def load_progress():
     if os.path.exists(LOGS_FILE):
         with open(LOGS_FILE, "r") as f:
@@ -94,26 +338,167 @@ def clear_progress_file():
     if os.path.exists(LOGS_FILE):
         os.remove(LOGS_FILE)
 
-def load_clone_progress():
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "r") as f:
-            data = json.load(f)
+def replay_checkpoint_journal(path):
+    state = {}
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            op = record.get("op")
+            if op == "snapshot":
+                state = record["state"]
+            elif op in ("roles", "channels", "categories", "messages", "emojis", "stickers", "threads"):
+                state.setdefault(f"completed_{op}", []).append(record["id"])
+                if "step" in record:
+                    state["current_step"] = record["step"]
+            elif op == "error":
+                state.setdefault("errors", []).append(record["message"])
+            elif op == "message":
+                channel_map = state.setdefault("message_map", {}).setdefault(str(record["channel"]), {})
+                channel_map[str(record["source"])] = record["target"]
+                if len(channel_map) > REPLY_WINDOW:
+                    del channel_map[next(iter(channel_map))]
+                cursor = state.setdefault("message_cursors", {}).get(str(record["channel"]), [0, 0])
+                state["message_cursors"][str(record["channel"])] = [record["source"], cursor[1] + 1]
+            elif op == "thread":
+                state.setdefault("thread_map", {})[str(record["source"])] = record["target"]
+            elif op == "channel":
+                state.setdefault("channel_map", {})[str(record["source"])] = record["target"]
+            elif op == "step":
+                state["current_step"] = record["step"]
+                state["total_steps"] = record.get("total_steps", state.get("total_steps", 0))
+    return state
+
+def write_checkpoint_records(path, records):
+    with open(path, "a") as f:
+        f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+def write_checkpoint_snapshot(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps({"op": "snapshot", "state": state}, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class CheckpointJournal:
+    def __init__(self, path, flush_interval=CHECKPOINT_FLUSH_INTERVAL, flush_count=CHECKPOINT_FLUSH_COUNT):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_count = flush_count
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.flush_task = None
+        self.flush_timer = None
+
+    def append(self, record):
+        if record["op"] == "step" and self.pending and self.pending[-1]["op"] == "step":
+            self.pending[-1] = record
+        else:
+            self.pending.append(record)
+        if len(self.pending) >= self.flush_count or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.schedule_flush()
+        elif self.flush_timer is None:
+            self.flush_timer = asyncio.get_running_loop().call_later(self.flush_interval, self.schedule_flush)
+
+    def schedule_flush(self):
+        if self.flush_timer:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.get_running_loop().create_task(self.flush())
+        else:
+            self.flush_timer = asyncio.get_running_loop().call_later(self.flush_interval, self.schedule_flush)
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            records, self.pending = self.pending, []
+            self.last_flush = time.monotonic()
+            start = time.perf_counter()
+            await run_cpu(write_checkpoint_records, self.path, records)
+            metrics.observe("clonebot_checkpoint_write_seconds", time.perf_counter() - start, kind="flush")
+
+    async def compact(self, snapshot):
+        async with self.lock:
+            state = snapshot()
+            self.pending = []
+            self.last_flush = time.monotonic()
+            start = time.perf_counter()
+            await run_cpu(write_checkpoint_snapshot, self.path, state)
+            metrics.observe("clonebot_checkpoint_write_seconds", time.perf_counter() - start, kind="compact")
+
+    def clear(self):
+        self.pending = []
+        if self.flush_timer:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+checkpoint_journals = {}
+
+def checkpoint_journal_for(key):
+    journal = checkpoint_journals.get(key)
+    if journal is None:
+        journal = checkpoint_journals[key] = CheckpointJournal(PROGRESS_FILE.format(key))
+    return journal
+
+async def load_clone_progress(journal):
+    if os.path.exists(journal.path):
+        data = await run_cpu(replay_checkpoint_journal, journal.path)
+        if data:
             log_action("Progress Loaded", "RESUMING", 
                       f"Previous progress found: {data.get('current_step', 0)}/{data.get('total_steps', 0)} steps")
-            return data
+        return data
     return {}
 
-def save_clone_progress(data):
-    with open(PROGRESS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-    log_action("Progress Saved", "UPDATED", 
-              f"Step {data.get('current_step', 0)}/{data.get('total_steps', 0)}")
-
-def clear_clone_progress():
-    if os.path.exists(PROGRESS_FILE):
-        os.remove(PROGRESS_FILE)
+def clear_clone_progress(journal=None):
+    if journal:
+        journal.clear()
+    else:
+        for journal in checkpoint_journals.values():
+            journal.clear()
+        prefix, suffix = PROGRESS_FILE.split("{}")
+        for name in os.listdir("."):
+            if name.startswith(prefix) and name.endswith(suffix):
+                os.remove(name)
     log_action("Progress Cleared", "RESET", "All progress tracking reset")
 
+def load_mirror_state(source_id, target_id):
+    path = MIRROR_FILE.format(source_id, target_id)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        data = json.load(f)
+    return {
+        "roles": {int(k): v for k, v in data.get("roles", {}).items()},
+        "channels": {int(k): v for k, v in data.get("channels", {}).items()},
+        "last_messages": {int(k): v for k, v in data.get("last_messages", {}).items()},
+        "synced_at": data.get("synced_at", 0)
+    }
+
+def write_mirror_state(source_id, target_id, state):
+    path = MIRROR_FILE.format(source_id, target_id)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+async def save_mirror_state(source_id, target_id, role_mapping, channel_mapping, last_messages):
+    state = {
+        "roles": dict(role_mapping),
+        "channels": dict(channel_mapping),
+        "last_messages": dict(last_messages),
+        "synced_at": time.time()
+    }
+    await asyncio.to_thread(write_mirror_state, source_id, target_id, state)
+
 def format_time_ago(timestamp):
     if timestamp == 0:
         return "Never"
@@ -129,141 +514,1114 @@ def format_time_ago(timestamp):
     else:
         return f"{int(diff/86400)} days ago"
 
-async def send_webhook_update(title, description, color=0x00ff00, fields=None):
-    global current_webhook_url
-    if not current_webhook_url:
-        log_action("Webhook Error", "FAILED", "No webhook URL configured!", Fore.RED)
-        return
-    
-    async with aiohttp.ClientSession() as session:
+class WebhookLogSink:
+    def __init__(self, max_queue=WEBHOOK_QUEUE_SIZE):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.session = None
+        self.worker = None
+        self.dropped = 0
+        self.remaining = None
+        self.reset_at = 0.0
+
+    def start(self):
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.get_running_loop().create_task(self.run())
+
+    def submit(self, embed):
+        self.start()
         try:
-            embed = discord.Embed(title=title, description=description, color=color)
-            embed.timestamp = datetime.now(timezone.utc)
-            if fields:
-                for name, value in fields:
-                    embed.add_field(name=name, value=value, inline=False)
-            webhook = discord.Webhook.from_url(current_webhook_url, session=session)
-            await webhook.send(embed=embed)
-            log_action("Webhook Sent", "SUCCESS", f"Title: {title}\nDescription: {description[:50]}...")
-        except Exception as e:
-            log_action("Webhook Error", "FAILED", str(e), Fore.RED)
+            self.queue.put_nowait(embed)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def next_batch(self, first):
+        embeds = [first]
+        while len(embeds) < WEBHOOK_BATCH_SIZE and not self.queue.empty():
+            embeds.append(self.queue.get_nowait())
+        if self.dropped:
+            if len(embeds) == WEBHOOK_BATCH_SIZE:
+                embeds.pop()
+                self.dropped += 1
+            summary = discord.Embed(
+                title="Log Events Dropped",
+                description=f"{self.dropped} log events were dropped while the webhook was overloaded",
+                color=0xffd700
+            )
+            summary.timestamp = datetime.now(timezone.utc)
+            embeds.append(summary)
+            self.dropped = 0
+        return embeds
+
+    async def wait_for_rate_limit(self):
+        if self.remaining == 0:
+            delay = self.reset_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.remaining = None
+
+    async def post(self, embeds):
+        payload = {"embeds": [embed.to_dict() for embed in embeds]}
+        while True:
+            await self.wait_for_rate_limit()
+            async with self.session.post(current_webhook_url, json=payload) as response:
+                headers = response.headers
+                if headers.get("X-RateLimit-Remaining") is not None:
+                    self.remaining = int(headers["X-RateLimit-Remaining"])
+                if headers.get("X-RateLimit-Reset-After") is not None:
+                    self.reset_at = time.monotonic() + float(headers["X-RateLimit-Reset-After"])
+                if response.status == 429:
+                    retry_after = float(headers.get("Retry-After", 1) or 1)
+                    self.remaining = 0
+                    self.reset_at = time.monotonic() + retry_after
+                    continue
+                response.raise_for_status()
+                return
+
+    async def run(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        while True:
+            embeds = self.next_batch(await self.queue.get())
+            if not current_webhook_url:
+                log_action("Webhook Error", "FAILED", "No webhook URL configured!", Fore.RED)
+                continue
+            try:
+                await self.post(embeds)
+                log_action("Webhook Sent", "SUCCESS", 
+                          f"Embeds: {len(embeds)}\nTitle: {embeds[0].title}", level=logging.DEBUG)
+            except Exception as e:
+                log_action("Webhook Error", "FAILED", str(e), Fore.RED)
+
+    async def close(self, timeout=5):
+        if self.worker and not self.worker.done():
+            deadline = time.monotonic() + timeout
+            while not self.queue.empty() and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            self.worker.cancel()
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+webhook_sink = WebhookLogSink()
+
+def load_attachment_cache(directory, index_path):
+    entries = []
+    if os.path.isdir(directory):
+        for entry in os.scandir(directory):
+            if entry.is_file() and len(entry.name) == 64:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    return [(name, size) for _, name, size in sorted(entries)], index
+
+def write_attachment_index(index_path, index):
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+class AttachmentCache:
+    def __init__(self, directory=ATTACHMENT_CACHE_DIR, limit=DEFAULT_ATTACHMENT_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.limit = limit
+        self.entries = collections.OrderedDict()
+        self.index = {}
+        self.pins = collections.Counter()
+        self.total_size = 0
+        self.bytes_downloaded = 0
+        self.session = None
+        self.downloads = asyncio.Semaphore(ATTACHMENT_DOWNLOADS)
+        self.load_lock = asyncio.Lock()
+        self.loaded = False
+        self.index_dirty = False
+        self.save_lock = asyncio.Lock()
+        self.save_timer = None
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    async def open(self):
+        async with self.load_lock:
+            if not self.loaded:
+                os.makedirs(self.directory, exist_ok=True)
+                entries, self.index = await asyncio.to_thread(load_attachment_cache, self.directory, self.index_path)
+                for digest, size in entries:
+                    self.entries[digest] = size
+                    self.total_size += size
+                self.loaded = True
+            if self.session is None or self.session.closed:
+                self.session = aiohttp.ClientSession()
+
+    def release(self, digest):
+        self.pins[digest] -= 1
+        if self.pins[digest] <= 0:
+            del self.pins[digest]
+        self.evict()
+
+    def evict(self):
+        for digest in list(self.entries):
+            if self.total_size <= self.limit:
+                break
+            if self.pins[digest]:
+                continue
+            self.total_size -= self.entries.pop(digest)
+            try:
+                os.remove(self.path(digest))
+            except FileNotFoundError:
+                pass
+
+    async def download(self, url):
+        tmp_path = os.path.join(self.directory, f"tmp-{uuid.uuid4().hex}")
+        size = 0
+        try:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(ATTACHMENT_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+            digest = await run_cpu(file_digest, tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if digest in self.entries:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, self.path(digest))
+            self.entries[digest] = size
+            self.total_size += size
+        self.bytes_downloaded += size
+        return digest
+
+    async def fetch(self, attachment):
+        await self.open()
+        key = str(attachment.id)
+        digest = self.index.get(key)
+        if digest not in self.entries:
+            async with self.downloads:
+                digest = await self.download(attachment.url)
+            self.index[key] = digest
+            self.index_dirty = True
+            if self.save_timer is None:
+                self.save_timer = asyncio.get_running_loop().call_later(CHECKPOINT_FLUSH_INTERVAL, self.schedule_save)
+        self.entries.move_to_end(digest)
+        self.pins[digest] += 1
+        return digest
+
+    async def fetch_all(self, attachments):
+        tasks = [asyncio.ensure_future(self.fetch(attachment)) for attachment in attachments]
+        try:
+            await asyncio.wait(tasks)
+        except BaseException:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    self.release(task.result())
+            raise
+        digests = []
+        for attachment, task in zip(attachments, tasks):
+            if task.exception() is not None:
+                log_action("Attachment", "SKIPPED", f"{attachment.filename}: {task.exception()}", Fore.YELLOW, level=logging.WARNING)
+                digests.append(None)
+            else:
+                digests.append(task.result())
+        return digests
+
+    def prefetch(self, attachments):
+        if not attachments:
+            return None
+        return asyncio.ensure_future(self.fetch_all(attachments))
+
+    def discard(self, prefetch):
+        if not prefetch:
+            return
+        if not prefetch.done():
+            prefetch.cancel()
+        elif not prefetch.cancelled() and prefetch.exception() is None:
+            for digest in prefetch.result():
+                if digest:
+                    self.release(digest)
+
+    def to_files(self, attachments, digests):
+        return [
+            discord.File(self.path(digest), filename=attachment.filename, spoiler=attachment.is_spoiler())
+            for attachment, digest in zip(attachments, digests)
+            if digest
+        ]
+
+    def schedule_save(self):
+        self.save_timer = None
+        asyncio.ensure_future(self.save_index())
+
+    async def save_index(self):
+        async with self.save_lock:
+            if not self.index_dirty:
+                return
+            self.index_dirty = False
+            self.index = {key: digest for key, digest in self.index.items() if digest in self.entries}
+            await asyncio.to_thread(write_attachment_index, self.index_path, dict(self.index))
+
+    async def close(self):
+        if self.save_timer:
+            self.save_timer.cancel()
+            self.save_timer = None
+        if self.loaded:
+            await self.save_index()
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+attachment_cache = AttachmentCache()
+
+def send_webhook_update(title, description, color=0x00ff00, fields=None):
+    embed = discord.Embed(title=title, description=description, color=color)
+    embed.timestamp = datetime.now(timezone.utc)
+    if fields:
+        for name, value in fields:
+            embed.add_field(name=name, value=value, inline=False)
+    webhook_sink.submit(embed)
 
 def print_progress_bar(iteration, total, prefix='', suffix='', length=50, fill='█', color=0xFFD700):
-    percent = ("{0:.1f}").format(100 * (iteration / float(total)))
-    filled_length = int(length * iteration // total)
-    bar = fill * filled_length + '-' * (length - filled_length)
-    gold_color = "\033[38;2;255;215;0m"
-    reset_color = "\033[0m"
-    
-    progress_line = f"{gold_color}╟{bar}╢{reset_color}"
-    percentage_line = f"{gold_color}║ {percent.rjust(6)}% complete {reset_color}"
-    info_line = f"{gold_color}║ {prefix.ljust(15)} {suffix.ljust(30)}{reset_color}"
-    
-    print(f"\r╔{'═' * (length+2)}╗")
-    print(f"\r{progress_line}")
-    print(f"\r{percentage_line}")
-    print(f"\r{info_line}")
-    print(f"\r╚{'═' * (length+2)}╝", end='\r')
-    
-    if iteration == total: 
-        print("\n" + " " * 100)
+    progress_renderer.update(prefix, iteration, total, suffix, length, fill)
+
+def finish_progress_bar(prefix):
+    progress_renderer.finish(prefix)
+
+def build_name_index(objects):
+    index = {}
+    for obj in objects:
+        index.setdefault(obj.name, obj)
+    return index
 
 class CloneProgress:
-    def __init__(self, total_steps):
+    __slots__ = ("start_time", "current_step", "total_steps", "errors", "completed_roles", "completed_channels",
+                 "completed_categories", "completed_messages", "completed_emojis", "completed_stickers",
+                 "completed_threads", "message_map", "message_cursors", "thread_map", "channel_map", "journal")
+
+    def __init__(self, total_steps, journal):
         self.start_time = time.time()
         self.current_step = 0
         self.total_steps = total_steps
         self.errors = []
-        self.completed_roles = []
-        self.completed_channels = []
-        self.completed_categories = []
+        self.completed_roles = set()
+        self.completed_channels = set()
+        self.completed_categories = set()
+        self.completed_messages = set()
+        self.completed_emojis = set()
+        self.completed_stickers = set()
+        self.completed_threads = set()
+        self.message_map = {}
+        self.message_cursors = {}
+        self.thread_map = {}
+        self.channel_map = {}
+        self.journal = journal
         log_action("Progress Init", "STARTED", f"Total steps: {total_steps}")
 
     def get_elapsed(self):
         return time.time() - self.start_time
 
     def get_progress_percent(self):
-        return (self.current_step / self.total_steps) * 100 if self.total_steps else 0
+        return min(100.0, (self.current_step / self.total_steps) * 100) if self.total_steps else 0
 
     def to_dict(self):
         return {
             "current_step": self.current_step,
             "total_steps": self.total_steps,
-            "errors": self.errors,
+            "errors": list(self.errors),
             "elapsed_time": self.get_elapsed(),
-            "completed_roles": self.completed_roles,
-            "completed_channels": self.completed_channels,
-            "completed_categories": self.completed_categories
+            "completed_roles": list(self.completed_roles),
+            "completed_channels": list(self.completed_channels),
+            "completed_categories": list(self.completed_categories),
+            "completed_messages": list(self.completed_messages),
+            "completed_emojis": list(self.completed_emojis),
+            "completed_stickers": list(self.completed_stickers),
+            "completed_threads": list(self.completed_threads),
+            "message_map": {
+                str(channel_id): {str(source_id): target_id for source_id, target_id in channel_map.items()}
+                for channel_id, channel_map in self.message_map.items()
+            },
+            "message_cursors": {str(channel_id): list(cursor) for channel_id, cursor in self.message_cursors.items()},
+            "thread_map": {str(source_id): target_id for source_id, target_id in self.thread_map.items()},
+            "channel_map": {str(source_id): target_id for source_id, target_id in self.channel_map.items()}
         }
 
-    def save(self):
-        save_clone_progress(self.to_dict())
+    def complete(self, kind, item_id, advance=True):
+        getattr(self, f"completed_{kind}").add(item_id)
+        record = {"op": kind, "id": item_id}
+        if advance:
+            self.current_step += 1
+            record["step"] = self.current_step
+        self.journal.append(record)
+
+    def advance(self):
+        self.current_step += 1
+        self.journal.append({"op": "step", "step": self.current_step, "total_steps": self.total_steps})
+
+    def map_message(self, channel_id, source_id, target_id):
+        channel_map = self.message_map.setdefault(channel_id, {})
+        channel_map[source_id] = target_id
+        if len(channel_map) > REPLY_WINDOW:
+            del channel_map[next(iter(channel_map))]
+        self.message_cursors[channel_id] = (source_id, self.message_count(channel_id) + 1)
+        self.journal.append({"op": "message", "channel": channel_id, "source": source_id, "target": target_id})
+
+    def map_thread(self, source_id, target_id):
+        self.thread_map[source_id] = target_id
+        self.journal.append({"op": "thread", "source": source_id, "target": target_id})
+
+    def map_channel(self, source_id, target_id):
+        self.channel_map[source_id] = target_id
+        self.journal.append({"op": "channel", "source": source_id, "target": target_id})
+
+    def message_cursor(self, channel_id):
+        return self.message_cursors.get(channel_id, (None, 0))[0]
+
+    def message_count(self, channel_id):
+        return self.message_cursors.get(channel_id, (None, 0))[1]
+
+    def latest_messages(self):
+        return {channel_id: cursor[0] for channel_id, cursor in self.message_cursors.items()}
+
+    def add_error(self, message):
+        self.errors.append(message)
+        self.journal.append({"op": "error", "message": message})
+
+    async def checkpoint(self):
+        await self.journal.compact(self.to_dict)
 
     def load(self, data):
         if isinstance(data, dict):
             self.current_step = data.get("current_step", 0)
             self.errors = data.get("errors", [])
-            self.completed_roles = data.get("completed_roles", [])
-            self.completed_channels = data.get("completed_channels", [])
-            self.completed_categories = data.get("completed_categories", [])
+            self.completed_roles = set(data.get("completed_roles", []))
+            self.completed_channels = set(data.get("completed_channels", []))
+            self.completed_categories = set(data.get("completed_categories", []))
+            self.completed_messages = set(data.get("completed_messages", []))
+            self.completed_emojis = set(data.get("completed_emojis", []))
+            self.completed_stickers = set(data.get("completed_stickers", []))
+            self.completed_threads = set(data.get("completed_threads", []))
+            self.message_map = {
+                int(channel_id): {int(source_id): target_id for source_id, target_id in list(channel_map.items())[-REPLY_WINDOW:]}
+                for channel_id, channel_map in data.get("message_map", {}).items()
+            }
+            self.message_cursors = {
+                int(channel_id): tuple(cursor) for channel_id, cursor in data.get("message_cursors", {}).items()
+            }
+            self.thread_map = {int(source_id): target_id for source_id, target_id in data.get("thread_map", {}).items()}
+            self.channel_map = {int(source_id): target_id for source_id, target_id in data.get("channel_map", {}).items()}
             log_action("Progress Load", "RESUMED", f"Loaded {self.current_step}/{self.total_steps} steps")
 
-intents = discord.Intents.default()
-intents.guilds = True
-intents.members = True
-intents.messages = True
-intents.message_content = True
-intents.emojis_and_stickers = True
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counters = collections.Counter()
+        self.histograms = {}
+        self.gauges = {}
+        self.help = {}
+        self.runner = None
+
+    def describe(self, name, kind, text):
+        self.help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram[0][i] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def gauge(self, name, func, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = func
+
+    @contextlib.contextmanager
+    def timed(self, phase):
+        start = time.perf_counter()
+        result = "ok"
+        try:
+            yield
+        except BaseException:
+            result = "error"
+            raise
+        finally:
+            self.inc("clonebot_operations_total", phase=phase, result=result)
+            self.observe("clonebot_operation_seconds", time.perf_counter() - start, phase=phase)
+
+    def render(self):
+        lines = []
+        samples = collections.defaultdict(list)
+        for (name, labels), value in self.counters.items():
+            samples[name].append((name, labels, value))
+        for (name, labels), func in self.gauges.items():
+            samples[name].append((name, labels, func()))
+        for (name, labels), (counts, total, count) in self.histograms.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                samples[name].append((name + "_bucket", labels + (("le", str(bound)),), bucket_count))
+            samples[name].append((name + "_bucket", labels + (("le", "+Inf"),), count))
+            samples[name].append((name + "_sum", labels, total))
+            samples[name].append((name + "_count", labels, count))
+        for name in sorted(samples):
+            if name in self.help:
+                kind, text = self.help[name]
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples[name]:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                lines.append(f"{sample_name}{{{label_text}}} {value}" if label_text else f"{sample_name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request):
+        from aiohttp import web
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self, port):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, METRICS_HOST, port).start()
+        log_action("Metrics", "LISTENING", f"http://{METRICS_HOST}:{port}/metrics")
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+metrics = Metrics()
+metrics.describe("clonebot_operations_total", "counter", "API operations by clone phase and result")
+metrics.describe("clonebot_operation_seconds", "histogram", "API operation latency by clone phase, including rate-limit waits")
+metrics.describe("clonebot_rate_limited_total", "counter", "429 responses received")
+metrics.describe("clonebot_retry_after_seconds_total", "counter", "Retry-After time requested by 429 responses")
+metrics.describe("clonebot_attachment_bytes_total", "counter", "Attachment bytes downloaded into the cache")
+metrics.describe("clonebot_checkpoint_write_seconds", "histogram", "Checkpoint journal flush and compaction time")
+metrics.describe("clonebot_queue_depth", "gauge", "Items waiting in internal queues")
+metrics.describe("clonebot_jobs_running", "gauge", "Clone, mirror and snapshot jobs currently running")
+
+def describe_frame(frame):
+    return f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+
+def coroutine_wait_site(coro):
+    frame = own_frame = None
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None) or frame
+        if frame is not None and frame.f_code.co_filename == __file__:
+            own_frame = frame
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    if frame is None:
+        return "<running>"
+    if own_frame is None or own_frame is frame:
+        return describe_frame(frame)
+    return f"{describe_frame(frame)} in {describe_frame(own_frame)}"
+
+def frame_stack(frame):
+    stack = []
+    while frame is not None:
+        stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+class JobProfiler:
+    active = None
+
+    def __init__(self, name, mode):
+        self.mode = mode
+        self.directory = os.path.join(PROFILE_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.current = "setup"
+        self.phases = []
+        self.durations = collections.Counter()
+        self.samples = collections.defaultdict(collections.Counter)
+        self.waits = collections.defaultdict(collections.Counter)
+        self.profile = None
+        self.stopping = threading.Event()
+        self.sampler = None
+        self.watcher = None
+
+    def start(self):
+        JobProfiler.active = self
+        os.makedirs(self.directory, exist_ok=True)
+        self.watcher = asyncio.get_running_loop().create_task(self.watch_tasks())
+        if self.mode == "sampling":
+            self.sampler = threading.Thread(target=self.sample_threads, name="profiler", daemon=True)
+            self.sampler.start()
+        log_action("Profiler", "STARTED", f"Mode: {self.mode}\nOutput: {self.directory}", Fore.MAGENTA)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.current = name
+        self.phases.append(name)
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        try:
+            yield
+        finally:
+            if self.profile:
+                self.profile.disable()
+                self.profile.dump_stats(os.path.join(self.directory, f"{len(self.phases):02d}-{name}.prof"))
+                self.profile = None
+            self.durations[name] += time.perf_counter() - start
+            self.current = "idle"
+
+    def sample_threads(self):
+        own_id = threading.get_ident()
+        while not self.stopping.wait(PROFILE_SAMPLE_INTERVAL):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            phase = self.current
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[phase][f"{names.get(thread_id, thread_id)};{frame_stack(frame)}"] += 1
+
+    async def watch_tasks(self):
+        own_task = asyncio.current_task()
+        while True:
+            await asyncio.sleep(PROFILE_TASK_INTERVAL)
+            waits = self.waits[self.current]
+            for task in asyncio.all_tasks():
+                if task is not own_task:
+                    waits[f"{coroutine_wait_site(task.get_coro())} <- {task.get_coro().__qualname__}"] += 1
+
+    def write_reports(self):
+        for phase, stacks in self.samples.items():
+            with open(os.path.join(self.directory, f"{phase}.folded"), "w") as f:
+                for stack, count in stacks.items():
+                    f.write(f"{stack} {count}\n")
+        summary = {"mode": self.mode, "phases": {}}
+        with open(os.path.join(self.directory, "tasks.txt"), "w") as f:
+            for phase, waits in self.waits.items():
+                total = sum(waits.values())
+                f.write(f"== {phase} ({self.durations.get(phase, 0.0):.2f}s, {total} task samples every {PROFILE_TASK_INTERVAL}s)\n")
+                for site, count in waits.most_common(PROFILE_TOP):
+                    f.write(f"{count * PROFILE_TASK_INTERVAL:10.1f} task-s  {100 * count / total:5.1f}%  {site}\n")
+                f.write("\n")
+                summary["phases"][phase] = {
+                    "seconds": round(self.durations.get(phase, 0.0), 3),
+                    "task_waits": {site: round(count * PROFILE_TASK_INTERVAL, 1) for site, count in waits.most_common(PROFILE_TOP)}
+                }
+        with open(os.path.join(self.directory, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=4)
+
+    async def stop(self):
+        self.stopping.set()
+        if self.profile:
+            self.profile.disable()
+            self.profile = None
+        if self.watcher:
+            self.watcher.cancel()
+        if self.sampler:
+            await asyncio.to_thread(self.sampler.join)
+        await asyncio.to_thread(self.write_reports)
+        JobProfiler.active = None
+        log_action("Profiler", "SAVED", f"Output: {self.directory}", Fore.MAGENTA)
+
+def start_job_profiler(name):
+    global profile_next_clone
+    mode = profile_next_clone or os.environ.get(PROFILE_ENV)
+    if not mode or JobProfiler.active:
+        return None
+    profile_next_clone = None
+    profiler = JobProfiler(name, mode if mode in PROFILE_MODES else PROFILE_MODES[0])
+    profiler.start()
+    return profiler
+
+def profile_phase(profiler, name):
+    return profiler.phase(name) if profiler else contextlib.nullcontext()
+
+async def run_phase(phase, route, func, *args, **kwargs):
+    with metrics.timed(phase):
+        return await request_scheduler.run(route, func, *args, **kwargs)
+
+def route_key(method, path):
+    parts = path.strip("/").split("/")
+    if parts[:1] == ["api"]:
+        parts = parts[2:]
+    normalized = []
+    for i, part in enumerate(parts):
+        if part.isdigit() and (i == 0 or parts[i - 1] not in MAJOR_PARAMETERS):
+            part = "{id}"
+        normalized.append(part)
+    return f"{method.upper()} /{'/'.join(normalized)}"
+
+current_job = contextvars.ContextVar("current_job", default=None)
+
+class JobCancelled(Exception):
+    pass
+
+def cancel_requested():
+    job = current_job.get()
+    return job is not None and job.cancelled
+
+class FairShare:
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self.active = collections.Counter()
+        self.waiters = collections.OrderedDict()
+
+    def grant(self, owner):
+        self.in_use += 1
+        self.active[owner] += 1
+
+    def release(self, owner):
+        self.in_use -= 1
+        self.active[owner] -= 1
+        if self.active[owner] <= 0:
+            del self.active[owner]
+        self.wake()
+
+    def wake(self):
+        while self.in_use < self.limit and self.waiters:
+            owner = min(self.waiters, key=lambda owner: self.active[owner])
+            waiters = self.waiters[owner]
+            future = waiters.popleft()
+            if not waiters:
+                del self.waiters[owner]
+            if not future.done():
+                self.grant(owner)
+                future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, owner):
+        if self.in_use < self.limit and not self.waiters:
+            self.grant(owner)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.setdefault(owner, collections.deque()).append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release(owner)
+                raise
+        try:
+            yield
+        finally:
+            self.release(owner)
 
-class CloneBot(commands.Bot):
+class RateLimitBucket:
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents, help_command=None)
+        self.lock = asyncio.Lock()
+        self.remaining = None
+        self.reset_at = 0.0
+
+    async def wait(self):
+        while self.remaining == 0:
+            delay = self.reset_at - time.monotonic()
+            if delay <= 0:
+                self.remaining = None
+                break
+            await asyncio.sleep(delay)
+
+class RequestScheduler:
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, global_rate=GLOBAL_RATE_LIMIT):
+        self.global_rate = global_rate
+        self.route_buckets = {}
+        self.buckets = {}
+        self.sent = collections.deque()
+        self.global_lock = asyncio.Lock()
+        self.global_reset_at = 0.0
+        self.rate_limited = 0
+        self.retry_after_total = 0.0
+        self.set_max_in_flight(max_in_flight)
+
+    def set_max_in_flight(self, limit):
+        self.max_in_flight = limit
+        self.capacity = FairShare(limit)
+        self.channel_slots = FairShare(limit)
+
+    def bucket_for(self, route):
+        key = self.route_buckets.get(route, route)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = RateLimitBucket()
+        return bucket
+
+    def link(self, route, bucket_hash):
+        key = f"{bucket_hash}:{'/'.join(part for part in route.split('/') if part.isdigit())}"
+        if self.route_buckets.get(route) == key:
+            return
+        self.route_buckets[route] = key
+        if key not in self.buckets and route in self.buckets:
+            self.buckets[key] = self.buckets.pop(route)
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(self.on_request_end)
+        return trace
+
+    async def on_request_end(self, session, context, params):
+        headers = params.response.headers
+        route = route_key(params.method, params.url.path)
+        bucket_hash = headers.get("X-RateLimit-Bucket")
+        if bucket_hash:
+            self.link(route, bucket_hash)
+        bucket = self.bucket_for(route)
+        now = time.monotonic()
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None:
+            bucket.remaining = int(remaining)
+        if reset_after is not None:
+            bucket.reset_at = now + float(reset_after)
+        if params.response.status == 429:
+            retry_after = float(headers.get("Retry-After", 0) or 0)
+            self.rate_limited += 1
+            self.retry_after_total += retry_after
+            if headers.get("X-RateLimit-Global"):
+                self.global_reset_at = now + retry_after
+            else:
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+            log_action("Rate Limited", "429", f"Route: {route}\nRetry after: {retry_after:.2f}s", Fore.YELLOW)
+
+    async def wait_for_global(self):
+        async with self.global_lock:
+            now = time.monotonic()
+            if self.global_reset_at > now:
+                await asyncio.sleep(self.global_reset_at - now)
+                now = time.monotonic()
+            while True:
+                while self.sent and self.sent[0] <= now - 1.0:
+                    self.sent.popleft()
+                if len(self.sent) < self.global_rate:
+                    break
+                await asyncio.sleep(self.sent[0] + 1.0 - now)
+                now = time.monotonic()
+            self.sent.append(now)
+
+    async def run(self, route, func, *args, **kwargs):
+        bucket = self.bucket_for(route)
+        async with bucket.lock:
+            await bucket.wait()
+            async with self.capacity.slot(current_job.get()):
+                await self.wait_for_global()
+                return await func(*args, **kwargs)
+
+request_scheduler = RequestScheduler()
+
+class Job:
+    def __init__(self, kind, source_name, target_guilds, user=None, channel_id=None):
+        self.id = uuid.uuid4().hex[:6]
+        self.kind = kind
+        self.source_name = source_name
+        self.target_guilds = list(target_guilds)
+        self.user = user
+        self.channel_id = channel_id
+        self.targets = []
+        self.cancelled = False
+        self.started = time.time()
+        self.task = None
+
+    def cancel(self):
+        self.cancelled = True
 
-    async def setup_hook(self):
-        await self.tree.sync()
-        log_action("Bot Setup", "READY", "Commands synced and bot is ready")
+    def get_progress_percent(self):
+        percents = [progress.get_progress_percent() for target_guild, progress in self.targets if progress.total_steps]
+        return sum(percents) / len(percents) if percents else None
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "source": self.source_name,
+            "targets": [guild.name for guild in self.target_guilds],
+            "user_id": self.user.id if self.user else None,
+            "channel_id": self.channel_id,
+            "cancelled": self.cancelled,
+            "started": self.started,
+            "progress": self.get_progress_percent(),
+            "in_flight": request_scheduler.capacity.active[self],
+            "worker": worker_index
+        }
+
+class RemoteJob:
+    def __init__(self, info):
+        self.info = info
+        self.id = info["id"]
+        self.kind = info["kind"]
+        self.source_name = info["source"]
+        self.channel_id = info["channel_id"]
+
+    def describe(self):
+        return self.info
+
+class CoordinatorClient:
+    def __init__(self, url, index):
+        self.url = url
+        self.index = index
+        self.session = None
+
+    async def request(self, method, path, payload=None):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        async with self.session.request(method, self.url + path, json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+class JobScheduler:
+    def __init__(self):
+        self.jobs = {}
+        self.remote = {}
+        self.sync_task = None
+
+    def all_jobs(self):
+        return [*self.jobs.values(), *self.remote.values()]
+
+    def find(self, job_id):
+        return self.jobs.get(job_id) or self.remote.get(job_id)
+
+    async def cancel(self, job):
+        if job.id in self.jobs:
+            job.cancel()
+        else:
+            await coordinator.request("POST", f"/jobs/{job.id}/cancel")
+
+    async def sync(self):
+        while True:
+            try:
+                state = await coordinator.request(
+                    "POST", f"/workers/{coordinator.index}/jobs", {"jobs": [job.describe() for job in self.jobs.values()]})
+                self.remote = {info["id"]: RemoteJob(info) for info in state["jobs"] if info["worker"] != coordinator.index}
+                for job_id in state["cancelled"]:
+                    if job_id in self.jobs:
+                        self.jobs[job_id].cancel()
+            except (aiohttp.ClientError, OSError) as e:
+                log_action("Coordinator", "UNREACHABLE", str(e), Fore.YELLOW, level=logging.WARNING)
+            await asyncio.sleep(COORDINATOR_SYNC_INTERVAL)
+
+    def conflict(self, guilds):
+        guild_ids = {guild.id for guild in guilds}
+        for job in self.jobs.values():
+            if guild_ids.intersection(guild.id for guild in job.target_guilds):
+                return job
+        return None
+
+    async def execute(self, job, coro):
+        current_job.set(job)
+        log_action("Job Started", job.id, 
+                  f"Kind: {job.kind}\nSource: {job.source_name}\n"
+                  f"Targets: {', '.join(guild.name for guild in job.target_guilds) or 'None'}")
+        try:
+            return await coro
+        finally:
+            log_action("Job Finished", "CANCELLED" if job.cancelled else "DONE",
+                      f"Job: {job.id}\nElapsed: {time.time() - job.started:.2f}s",
+                      Fore.YELLOW if job.cancelled else Fore.WHITE)
+
+    async def run(self, job, coro):
+        self.jobs[job.id] = job
+        job.task = asyncio.ensure_future(self.execute(job, coro))
+        try:
+            return await job.task
+        finally:
+            self.jobs.pop(job.id, None)
+
+job_scheduler = JobScheduler()
+
+async def set_user_source(user_id, guild_id):
+    user_source_guilds[user_id] = guild_id
+    if coordinator:
+        await coordinator.request("PUT", f"/sources/{user_id}", {"guild_id": guild_id})
+
+async def get_user_source(user_id):
+    if coordinator:
+        try:
+            guild_id = (await coordinator.request("GET", f"/sources/{user_id}"))["guild_id"]
+        except (aiohttp.ClientError, OSError) as e:
+            log_action("Coordinator", "UNREACHABLE", str(e), Fore.YELLOW, level=logging.WARNING)
+        else:
+            if guild_id:
+                user_source_guilds[user_id] = guild_id
+    return user_source_guilds.get(user_id)
+
+async def resolve_guild(guild_id):
+    guild = bot.get_guild(guild_id)
+    if guild or coordinator is None or not guild_id:
+        return guild
+    try:
+        guild = await bot.fetch_guild(guild_id)
+        for channel in await guild.fetch_channels():
+            guild._add_channel(channel)
+    except discord.HTTPException:
+        return None
+    log_action("Remote Guild", "FETCHED", f"{guild.name} is on another worker, loaded {len(guild.channels)} channels over REST")
+    return guild
+
+def cache_options(profile):
+    intents = discord.Intents.default()
+    intents.guilds = True
+    intents.members = True
+    intents.messages = True
+    intents.message_content = True
+    intents.emojis_and_stickers = True
+    if profile != "lean":
+        return {"intents": intents}
+    intents.messages = False
+    intents.typing = False
+    intents.voice_states = False
+    return {
+        "intents": intents,
+        "chunk_guilds_at_startup": False,
+        "max_messages": None,
+        "member_cache_flags": discord.MemberCacheFlags.none()
+    }
+
+class CloneBot(commands.AutoShardedBot):
+    def __init__(self, **options):
+        super().__init__(command_prefix="!", help_command=None,
+                         http_trace=request_scheduler.trace_config(), **options)
+        self.started_at = time.perf_counter()
+        self.ready_once = False
+
+    async def sync_commands(self, force=False):
+        guild = discord.Object(id=int(dev_guild_id)) if dev_guild_id else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        key = f"{self.application_id}-{guild.id}" if guild else str(self.application_id)
+        fingerprint = command_fingerprint(self.tree, guild)
+        fingerprints = await asyncio.to_thread(load_command_fingerprints)
+        if not force and fingerprints.get(key) == fingerprint:
+            log_action("Command Sync", "SKIPPED", "Command tree unchanged since the last sync")
+            return None
+        synced = await self.tree.sync(guild=guild)
+        fingerprints[key] = fingerprint
+        await asyncio.to_thread(save_command_fingerprints, fingerprints)
+        log_action("Command Sync", "SYNCED", f"{len(synced)} commands " + (f"to guild {guild.id}" if guild else "globally"))
+        return synced
+
+    async def on_ready(self):
+        if self.ready_once:
+            return
+        self.ready_once = True
+        if worker_index is None:
+            print_ascii_header()
+        log_action("Bot Setup", "READY", f"Logged in as {self.user} with shards {sorted(self.shards)} of {self.shard_count} "
+                                          f"in {time.perf_counter() - self.started_at:.2f}s")
+        if metrics_port:
+            await metrics.start(int(metrics_port) + (worker_index or 0))
+        if coordinator:
+            job_scheduler.sync_task = asyncio.ensure_future(job_scheduler.sync())
+        if worker_index:
+            return
+        try:
+            await self.sync_commands()
+        except Exception as e:
+            log_action("Command Sync", "FAILED", str(e), Fore.RED)
+
+    async def close(self):
+        if job_scheduler.sync_task:
+            job_scheduler.sync_task.cancel()
+        if coordinator:
+            await coordinator.close()
+        tasks = [job.task for job in job_scheduler.jobs.values() if job.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for journal in list(checkpoint_journals.values()):
+            await journal.flush()
+        if cpu_pool:
+            cpu_pool.shutdown(wait=False, cancel_futures=True)
+        await webhook_sink.close()
+        await attachment_cache.close()
+        await metrics.stop()
+        await super().close()
+        console_writer.stop()
     
     async def on_message(self, message):
         if message.author.bot:
             return
         await self.process_commands(message)
 
-bot = CloneBot()
-
-@bot.tree.command(name="help", description="Show all available commands")
+slash_commands = []
+
+def slash_command(**kwargs):
+    def decorator(func):
+        command = app_commands.command(**kwargs)(func)
+        slash_commands.append(command)
+        return command
+    return decorator
+
+def build_bot(shards=1, shard_ids=None):
+    global bot
+    bot = CloneBot(shard_count=shards, shard_ids=shard_ids, **cache_options(cache_profile))
+    for command in slash_commands:
+        bot.tree.add_command(command)
+    if cache_profile == "lean":
+        log_action("Cache Profile", "LEAN", "Startup chunking, message cache and member cache are off")
+    return bot
+
+bot = None
+message_queues = set()
+metrics.gauge("clonebot_rate_limited_total", lambda: request_scheduler.rate_limited)
+metrics.gauge("clonebot_retry_after_seconds_total", lambda: request_scheduler.retry_after_total)
+metrics.gauge("clonebot_attachment_bytes_total", lambda: attachment_cache.bytes_downloaded)
+metrics.gauge("clonebot_queue_depth", lambda: webhook_sink.queue.qsize(), queue="webhook")
+metrics.gauge("clonebot_queue_depth", lambda: console_writer.queue.qsize(), queue="console")
+metrics.gauge("clonebot_queue_depth", lambda: sum(q.qsize() for q in message_queues), queue="messages")
+metrics.gauge("clonebot_jobs_running", lambda: len(job_scheduler.jobs))
+
+@slash_command(name="help", description="Show all available commands")
 async def help_command(interaction: discord.Interaction):
     global last_command_time, last_command_name
     
     embed = discord.Embed(title=" CloneBot Help", color=0x7289da)
     embed.description = "Advanced server cloning bot with message cloning ability."
     embed.add_field(name="/source <id>", value="Set source server ID (DM compatible)", inline=False)
-    embed.add_field(name="/clone [ignore_channels]", value="Start cloning with optional channel exclusions", inline=False)
-    embed.add_field(name="/cancel", value="Stop current cloning operation", inline=False)
+    embed.add_field(name="/clone [ignore_channels] [snapshot]", value="Start cloning with optional channel exclusions, or restore from a snapshot file", inline=False)
+    embed.add_field(name="/mirror [ignore_channels]", value="Apply only the changes since the last clone or mirror of the source server", inline=False)
+    embed.add_field(name="/snapshot [ignore_channels]", value="Export the source server to a compressed snapshot file", inline=False)
+    embed.add_field(name="/jobs", value="List running clone, mirror and snapshot jobs", inline=False)
+    embed.add_field(name="/cancel [job]", value="Stop a job, or the jobs started in this channel", inline=False)
     embed.add_field(name="/purge", value="Wipe all channels and roles", inline=False)
     embed.add_field(name="/info", value="Show current confign", inline=False)
     embed.add_field(name="/webhook <url>", value="Change logging webhook URL", inline=False)
-    embed.add_field(name="/sync", value="Sync slash commands (owner only)", inline=False)
+    embed.add_field(name="/sync", value="Force a slash command sync (owner only)", inline=False)
+    embed.add_field(name="/profile [mode]", value="Profile the next clone job (owner only)", inline=False)
     embed.add_field(name="/clearjson", value="Clear the progress tracking file", inline=False)
     embed.set_footer(text=f"Bot Owner: @{bot_owner}")
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@bot.tree.command(name="sync", description="Sync slash commands (owner only)")
+@slash_command(name="sync", description="Sync slash commands (owner only)")
 async def sync(interaction: discord.Interaction):
     if interaction.user.id != bot.owner_id:
         await interaction.response.send_message("You must be the bot owner to use this command.", ephemeral=True)
         return
     
     try:
-        await bot.tree.sync()
-        await interaction.response.send_message("Successfully synced slash commands!", ephemeral=True)
+        synced = await bot.sync_commands(force=True)
+        scope = f"to guild {dev_guild_id}" if dev_guild_id else "globally"
+        await interaction.response.send_message(f"Successfully synced {len(synced)} slash commands {scope}!", ephemeral=True)
     except Exception as e:
         await interaction.response.send_message(f"Failed to sync commands: {e}", ephemeral=True)
 
-@bot.tree.command(name="clearjson", description="Clear the progress tracking file")
+@slash_command(name="clearjson", description="Clear the progress tracking file")
 async def clearjson(interaction: discord.Interaction):
     global last_command_time, last_command_name
     last_command_time = time.time()
     last_command_name = "/clearjson"
+
+    if job_scheduler.all_jobs():
+        embed = discord.Embed(
+            title="⏳ Jobs Running",
+            description="Wait for the running jobs to finish or `/cancel` them first",
+            color=0xffd700
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
     
     try:
         clear_clone_progress()
@@ -281,17 +1639,18 @@ async def clearjson(interaction: discord.Interaction):
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@bot.tree.command(name="info", description="Show current bot configuration")
+@slash_command(name="info", description="Show current bot configuration")
 async def info_command(interaction: discord.Interaction):
     global last_command_time, user_source_guilds, current_webhook_url, last_command_name
     
     embed = discord.Embed(title="ℹ️ Bot Information", color=0x7289da)
     embed.add_field(name="Owner", value=f"@{bot_owner}", inline=True)
     embed.add_field(name="Webhook URL", value=f"`{current_webhook_url[:30]}...`" if current_webhook_url else "Not set", inline=True)
+    embed.add_field(name="Max In-Flight", value=str(request_scheduler.max_in_flight), inline=True)
     
-    if interaction.user.id in user_source_guilds:
-        source_guild_id = user_source_guilds[interaction.user.id]
-        source_guild = bot.get_guild(source_guild_id)
+    source_guild_id = await get_user_source(interaction.user.id)
+    if source_guild_id:
+        source_guild = await resolve_guild(source_guild_id)
         if source_guild:
             embed.add_field(name="Source Server", value=f"{source_guild.name}\n(ID: {source_guild.id})", inline=False)
             set_by = await bot.fetch_user(interaction.user.id)
@@ -301,7 +1660,7 @@ async def info_command(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@bot.tree.command(name="webhook", description="Change the logging webhook URL")
+@slash_command(name="webhook", description="Change the logging webhook URL")
 @app_commands.describe(url="The new webhook URL")
 async def webhook_command(interaction: discord.Interaction, url: str):
     global current_webhook_url, last_command_time, last_command_name
@@ -326,11 +1685,11 @@ async def webhook_command(interaction: discord.Interaction, url: str):
     )
     await interaction.response.send_message(embed=embed, ephemeral=True)
     
-    await send_webhook_update("Webhook Test", 
-                            "This is a test message to confirm the new webhook is working",
-                            fields=[("Changed By", interaction.user.mention)])
+    send_webhook_update("Webhook Test", 
+                      "This is a test message to confirm the new webhook is working",
+                      fields=[("Changed By", interaction.user.mention)])
 
-@bot.tree.command(name="source", description="Set the source server ID for cloning")
+@slash_command(name="source", description="Set the source server ID for cloning")
 @app_commands.describe(guild_id="The source server guild ID to clone from")
 async def source(interaction: discord.Interaction, guild_id: str):
     global last_command_time, last_command_name
@@ -338,16 +1697,16 @@ async def source(interaction: discord.Interaction, guild_id: str):
     last_command_name = "/source"
     
     try:
-        user_source_guilds[interaction.user.id] = int(guild_id)
+        await set_user_source(interaction.user.id, int(guild_id))
         embed = discord.Embed(
             title="✅ Source Set",
             description=f"Source server configured: `{guild_id}`",
             color=0x00ff00
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
-        await send_webhook_update("Source Configured", 
-                                f"User {interaction.user} set source to {guild_id}",
-                                fields=[("Operator", interaction.user.mention)])
+        send_webhook_update("Source Configured", 
+                          f"User {interaction.user} set source to {guild_id}",
+                          fields=[("Operator", interaction.user.mention)])
     except ValueError:
         embed = discord.Embed(
             title="❌ Invalid ID",
@@ -356,13 +1715,17 @@ async def source(interaction: discord.Interaction, guild_id: str):
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@bot.tree.command(name="clone", description="Clone the source server to this server")
-@app_commands.describe(ignore_channels="Comma-separated channel IDs to exclude messages from")
-async def clone(interaction: discord.Interaction, ignore_channels: str = None):
-    global cancel_flag, last_command_time, last_command_name
+@slash_command(name="clone", description="Clone the source server to this server")
+@app_commands.describe(
+    ignore_channels="Comma-separated channel IDs to exclude messages from",
+    snapshot="Snapshot file name to restore from instead of the live source server",
+    targets="Comma-separated extra server IDs to clone into at the same time"
+)
+async def clone(interaction: discord.Interaction, ignore_channels: str = None, snapshot: str = None, targets: str = None):
+    global last_command_time, last_command_name
     last_command_time = time.time()
     last_command_name = "/clone"
-    cancel_flag = False
+    profiler = None
     
     if not interaction.guild:
         embed = discord.Embed(
@@ -372,8 +1735,8 @@ async def clone(interaction: discord.Interaction, ignore_channels: str = None):
         )
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    source_guild_id = user_source_guilds.get(interaction.user.id)
-    if not source_guild_id:
+    source_guild_id = await get_user_source(interaction.user.id)
+    if not source_guild_id and not snapshot:
         embed = discord.Embed(
             title="❌ No Source",
             description="Use `/source` first to set origin server",
@@ -381,20 +1744,43 @@ async def clone(interaction: discord.Interaction, ignore_channels: str = None):
         )
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    ignored_channel_ids = []
-    if ignore_channels:
-        try:
-            ignored_channel_ids = [int(cid.strip()) for cid in ignore_channels.split(',')]
-        except ValueError:
+    try:
+        ignored_channel_ids = parse_channel_ids(ignore_channels)
+        extra_target_ids = parse_channel_ids(targets)
+    except ValueError:
+        embed = discord.Embed(
+            title="❌ Invalid IDs",
+            description="Channel and server IDs must be numeric values",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    target_guilds = [interaction.guild]
+    for guild_id in extra_target_ids:
+        guild = bot.get_guild(guild_id)
+        if not guild:
             embed = discord.Embed(
-                title="❌ Invalid Channels",
-                description="Channel IDs must be numeric values",
+                title="❌ Target Missing",
+                description=f"Bot is not in target server `{guild_id}`",
                 color=0xff0000
             )
             return await interaction.response.send_message(embed=embed, ephemeral=True)
+        if guild not in target_guilds:
+            target_guilds.append(guild)
 
-    source_guild = bot.get_guild(source_guild_id)
-    target_guild = interaction.guild
+    if snapshot:
+        snapshot_path = os.path.join(SNAPSHOT_DIR, os.path.basename(snapshot))
+        if not os.path.exists(snapshot_path):
+            embed = discord.Embed(
+                title="❌ Snapshot Missing",
+                description=f"No snapshot named `{os.path.basename(snapshot)}` in `{SNAPSHOT_DIR}/`",
+                color=0xff0000
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+        source_guild = await load_snapshot(snapshot_path)
+    else:
+        source_guild = await resolve_guild(source_guild_id)
+    target_names = ", ".join(f"**{guild.name}**" for guild in target_guilds)
 
     if not source_guild:
         embed = discord.Embed(
@@ -404,63 +1790,75 @@ async def clone(interaction: discord.Interaction, ignore_channels: str = None):
         )
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    if interaction.channel.id in cloning_tasks:
+    running_job = job_scheduler.conflict(target_guilds)
+    if running_job:
         embed = discord.Embed(
             title="⏳ Operation Ongoing",
-            description="Clone already running in this channel",
+            description=f"Job `{running_job.id}` is already running in a target server",
             color=0xffd700
         )
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    job = Job("clone", source_guild.name, target_guilds, interaction.user, interaction.channel.id)
     try:
         embed = discord.Embed(
             title=" Clone Started",
-            description=f"Cloning from **{source_guild.name}** to **{target_guild.name}**",
+            description=f"Cloning from **{source_guild.name}** to {target_names}",
             color=0x00ff00
         )
+        embed.add_field(name="Job", value=f"`{job.id}`")
         embed.add_field(name="Ignored Channels", value=str(ignored_channel_ids) if ignored_channel_ids else "None")
         await interaction.response.send_message(embed=embed)
         initial_msg = await interaction.original_response()
 
-        total_steps = len(source_guild.roles) + len(source_guild.channels)
+        total_steps = len(source_guild.roles) + len(source_guild.channels) + len(source_guild.emojis) + len(source_guild.stickers)
         for tc in source_guild.text_channels:
             if tc.id not in ignored_channel_ids:
-                total_steps += 500
-
-        progress = CloneProgress(total_steps)
-        existing_progress = load_clone_progress()
-        if existing_progress:
-            progress.load(existing_progress)
-            print(f"{Fore.YELLOW}Resuming from previous progress at {progress.get_progress_percent():.1f}%{Style.RESET_ALL}")
+                total_steps += message_history_limit or DEFAULT_MESSAGE_HISTORY
+
+        clone_targets = job.targets
+        resumed = False
+        for target_guild in target_guilds:
+            progress = CloneProgress(total_steps, checkpoint_journal_for(f"{source_guild.id}-{target_guild.id}"))
+            existing_progress = await load_clone_progress(progress.journal)
+            if existing_progress:
+                resumed = True
+                progress.load(existing_progress)
+                await progress.checkpoint()
+                log_action("Clone Resume", "RESUMING", 
+                          f"{target_guild.name} from previous progress at {progress.get_progress_percent():.1f}%", Fore.YELLOW)
+            clone_targets.append((target_guild, progress))
             
-        cloning_tasks[interaction.channel.id] = progress
+        profiler = start_job_profiler(f"clone-{job.id}")
 
-        await send_webhook_update("Clone Started", 
+        send_webhook_update("Clone Started", 
             f"**Source**: {source_guild.name} ({source_guild.id})\n"
-            f"**Target**: {target_guild.name} ({target_guild.id})",
+            f"**Targets**: {', '.join(f'{guild.name} ({guild.id})' for guild in target_guilds)}",
             fields=[
+                ("Job", job.id),
                 ("Initiator", interaction.user.mention),
                 ("Ignored Channels", ', '.join(map(str, ignored_channel_ids)) if ignored_channel_ids else "None"),
-                ("Status", "Resuming from previous progress" if existing_progress else "Starting fresh clone")
+                ("Status", "Resuming from previous progress" if resumed else "Starting fresh clone")
             ])
 
-        await clone_server(source_guild, target_guild, progress, interaction.channel, ignored_channel_ids)
+        await job_scheduler.run(job, clone_server(source_guild, clone_targets, ignored_channel_ids, profiler))
 
-        del cloning_tasks[interaction.channel.id]
-        clear_clone_progress()
+        for target_guild, progress in clone_targets:
+            clear_clone_progress(progress.journal)
         
+        elapsed = max(progress.get_elapsed() for target_guild, progress in clone_targets)
         embed = discord.Embed(
             title="✅ Clone Complete",
-            description=f"Successfully cloned {source_guild.name}",
+            description=f"Successfully cloned {source_guild.name} to {target_names}",
             color=0x00ff00
         )
-        embed.add_field(name="Duration", value=f"{progress.get_elapsed():.2f} seconds")
+        embed.add_field(name="Duration", value=f"{elapsed:.2f} seconds")
         await initial_msg.edit(embed=embed)
         
-        await send_webhook_update("Clone Completed", 
-            f"Successfully cloned {source_guild.name} to {target_guild.name}",
+        send_webhook_update("Clone Completed", 
+            f"Successfully cloned {source_guild.name} to {', '.join(guild.name for guild in target_guilds)}",
             color=0x00ff00,
-            fields=[("Duration", f"{progress.get_elapsed():.2f} seconds")])
+            fields=[("Duration", f"{elapsed:.2f} seconds")])
 
     except Exception as e:
         embed = discord.Embed(
@@ -469,24 +1867,251 @@ async def clone(interaction: discord.Interaction, ignore_channels: str = None):
             color=0xff0000
         )
         await interaction.followup.send(embed=embed)
-        await send_webhook_update("Clone Failed", f"Error: {str(e)}", 0xff0000)
-        if interaction.channel.id in cloning_tasks:
-            del cloning_tasks[interaction.channel.id]
+        send_webhook_update("Clone Failed", f"Error: {str(e)}", 0xff0000)
+        for target_guild, progress in job.targets:
+            await progress.journal.flush()
+    except asyncio.CancelledError:
+        for target_guild, progress in job.targets:
+            await progress.journal.flush()
+        raise
+    finally:
+        if profiler:
+            await profiler.stop()
+
+@slash_command(name="profile", description="Profile the next clone job (owner only)")
+@app_commands.describe(mode="cprofile for per-phase function profiles, sampling for all-thread stack samples")
+@app_commands.choices(mode=[app_commands.Choice(name=mode, value=mode) for mode in PROFILE_MODES])
+async def profile_command(interaction: discord.Interaction, mode: str = PROFILE_MODES[0]):
+    global profile_next_clone, last_command_time, last_command_name
+    last_command_time = time.time()
+    last_command_name = "/profile"
+
+    if not await bot.is_owner(interaction.user):
+        await interaction.response.send_message("You must be the bot owner to use this command.", ephemeral=True)
+        return
+
+    profile_next_clone = mode
+    embed = discord.Embed(
+        title="🔬 Profiling Armed",
+        description=f"The next `/clone` will be profiled with `{mode}`\nReports are written to `{PROFILE_DIR}/` when it finishes",
+        color=0x7289da
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@bot.tree.command(name="cancel", description="Cancel the current cloning operation")
-async def cancel(interaction: discord.Interaction):
-    global cancel_flag, last_command_time, last_command_name
+@slash_command(name="cancel", description="Cancel a running job")
+@app_commands.describe(job="Job ID from /jobs (defaults to the jobs started in this channel)")
+async def cancel(interaction: discord.Interaction, job: str = None):
+    global last_command_time, last_command_name
     last_command_time = time.time()
     last_command_name = "/cancel"
-    cancel_flag = True
+
+    if job:
+        jobs = [job_scheduler.find(job)] if job_scheduler.find(job) else []
+    else:
+        jobs = [running for running in job_scheduler.all_jobs() if running.channel_id == interaction.channel_id]
+    if not jobs:
+        embed = discord.Embed(
+            title="❌ No Job",
+            description=f"No running job `{job}`" if job else "No jobs running in this channel, see `/jobs`",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    if (any(running.describe()["user_id"] not in (None, interaction.user.id) for running in jobs)
+            and not await bot.is_owner(interaction.user)):
+        embed = discord.Embed(
+            title="🚫 Not Allowed",
+            description="Only the user who started a job or the bot owner can cancel it",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    for running in jobs:
+        await job_scheduler.cancel(running)
     embed = discord.Embed(
         title="⏹️ Cancellation Sent",
-        description="Stopping current clone operation...",
+        description=f"Stopping {', '.join(f'`{running.id}`' for running in jobs)}...",
         color=0xffd700
     )
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@bot.tree.command(name="purge", description="Delete all roles and channels in this server")
+@cancel.autocomplete("job")
+async def cancel_job_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=f"{job.id} {job.kind} {job.source_name}"[:100], value=job.id)
+        for job in job_scheduler.all_jobs() if job.id.startswith(current)
+    ][:25]
+
+@slash_command(name="jobs", description="List running clone, mirror and snapshot jobs")
+async def jobs_command(interaction: discord.Interaction):
+    global last_command_time, last_command_name
+    last_command_time = time.time()
+    last_command_name = "/jobs"
+
+    embed = discord.Embed(title="📋 Jobs", color=0x7289da)
+    jobs = [job.describe() for job in job_scheduler.all_jobs()]
+    if not jobs:
+        embed.description = "No jobs running"
+    for job in jobs[:25]:
+        percent = job["progress"]
+        targets = ", ".join(job["targets"]) or "Snapshot file"
+        started_by = f"<@{job['user_id']}>" if job["user_id"] else "n/a"
+        worker = f" · Worker {job['worker']}" if job["worker"] is not None else ""
+        embed.add_field(
+            name=f"`{job['id']}` {job['kind']}{' (cancelling)' if job['cancelled'] else ''}",
+            value=f"{job['source']} → {targets}\n"
+                  f"Progress: {f'{percent:.1f}%' if percent is not None else 'n/a'} · "
+                  f"Running {time.time() - job['started']:.0f}s\n"
+                  f"In flight: {job['in_flight']} · "
+                  f"Started by {started_by}{worker}",
+            inline=False
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@slash_command(name="snapshot", description="Export the source server to a snapshot file")
+@app_commands.describe(ignore_channels="Comma-separated channel IDs to exclude messages from")
+async def snapshot_command(interaction: discord.Interaction, ignore_channels: str = None):
+    global last_command_time, last_command_name
+    last_command_time = time.time()
+    last_command_name = "/snapshot"
+
+    source_guild = await resolve_guild(await get_user_source(interaction.user.id))
+    if not source_guild:
+        embed = discord.Embed(
+            title="❌ No Source",
+            description="Use `/source` first to set a server the bot is in",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    try:
+        ignored_channel_ids = parse_channel_ids(ignore_channels)
+    except ValueError:
+        embed = discord.Embed(
+            title="❌ Invalid Channels",
+            description="Channel IDs must be numeric values",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    file_name = f"{source_guild.id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.cbsnap"
+    job = Job("snapshot", source_guild.name, [], interaction.user, interaction.channel_id)
+    embed = discord.Embed(
+        title="📦 Snapshot Started",
+        description=f"Exporting **{source_guild.name}** to `{file_name}`",
+        color=0x00ff00
+    )
+    embed.add_field(name="Job", value=f"`{job.id}`")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    try:
+        start_time = time.time()
+        message_count = await job_scheduler.run(
+            job, export_snapshot(source_guild, os.path.join(SNAPSHOT_DIR, file_name), ignored_channel_ids))
+        embed = discord.Embed(
+            title="✅ Snapshot Complete",
+            description=f"Restore it with `/clone snapshot:{file_name}`",
+            color=0x00ff00
+        )
+        embed.add_field(name="Messages", value=str(message_count))
+        embed.add_field(name="Duration", value=f"{time.time() - start_time:.2f} seconds")
+        await interaction.edit_original_response(embed=embed)
+        send_webhook_update("Snapshot Exported",
+            f"Exported {source_guild.name} ({source_guild.id}) to {file_name}",
+            fields=[("Operator", interaction.user.mention), ("Messages", str(message_count))])
+    except Exception as e:
+        embed = discord.Embed(
+            title="❌ Snapshot Failed",
+            description=str(e),
+            color=0xff0000
+        )
+        await interaction.edit_original_response(embed=embed)
+        send_webhook_update("Snapshot Failed", f"Error: {str(e)}", 0xff0000)
+
+@slash_command(name="mirror", description="Sync this server with changes in the source server")
+@app_commands.describe(ignore_channels="Comma-separated channel IDs to exclude messages from")
+async def mirror(interaction: discord.Interaction, ignore_channels: str = None):
+    global last_command_time, last_command_name
+    last_command_time = time.time()
+    last_command_name = "/mirror"
+
+    if not interaction.guild:
+        embed = discord.Embed(
+            title="🚫 Server Only",
+            description="This command must be used in a server",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    source_guild = await resolve_guild(await get_user_source(interaction.user.id))
+    if not source_guild:
+        embed = discord.Embed(
+            title="❌ No Source",
+            description="Use `/source` first to set a server the bot is in",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    try:
+        ignored_channel_ids = parse_channel_ids(ignore_channels)
+    except ValueError:
+        embed = discord.Embed(
+            title="❌ Invalid Channels",
+            description="Channel IDs must be numeric values",
+            color=0xff0000
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    target_guild = interaction.guild
+    running_job = job_scheduler.conflict([target_guild])
+    if running_job:
+        embed = discord.Embed(
+            title="⏳ Operation Ongoing",
+            description=f"Job `{running_job.id}` is already running in this server",
+            color=0xffd700
+        )
+        return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    job = Job("mirror", source_guild.name, [target_guild], interaction.user, interaction.channel.id)
+    embed = discord.Embed(
+        title="🔁 Mirror Started",
+        description=f"Syncing **{source_guild.name}** into **{target_guild.name}**",
+        color=0x00ff00
+    )
+    embed.add_field(name="Job", value=f"`{job.id}`")
+    await interaction.response.send_message(embed=embed)
+    initial_msg = await interaction.original_response()
+
+    progress = CloneProgress(0, checkpoint_journal_for(f"mirror-{source_guild.id}-{target_guild.id}"))
+    job.targets.append((target_guild, progress))
+    try:
+        stats = await job_scheduler.run(job, sync_server(source_guild, target_guild, progress, ignored_channel_ids))
+        clear_clone_progress(progress.journal)
+        summary = "\n".join(f"{name}: {count}" for name, count in sorted(stats.items())) or "Already up to date"
+        embed = discord.Embed(
+            title="✅ Mirror Complete",
+            description=summary,
+            color=0x00ff00
+        )
+        embed.add_field(name="Duration", value=f"{progress.get_elapsed():.2f} seconds")
+        await initial_msg.edit(embed=embed)
+        send_webhook_update("Mirror Completed",
+            f"Synced {source_guild.name} to {target_guild.name}",
+            fields=[("Changes", summary), ("Duration", f"{progress.get_elapsed():.2f} seconds")])
+    except Exception as e:
+        embed = discord.Embed(
+            title="❌ Mirror Failed",
+            description=str(e),
+            color=0xff0000
+        )
+        await initial_msg.edit(embed=embed)
+        send_webhook_update("Mirror Failed", f"Error: {str(e)}", 0xff0000)
+        await progress.journal.flush()
+    except asyncio.CancelledError:
+        await progress.journal.flush()
+        raise
+
+@slash_command(name="purge", description="Delete all roles and channels in this server")
 async def purge(interaction: discord.Interaction):
     global last_command_time, last_command_name
     last_command_time = time.time()
@@ -508,12 +2133,13 @@ async def purge(interaction: discord.Interaction):
     msg = await interaction.response.send_message(embed=embed)
     confirm_msg = await interaction.original_response()
     
-    def check(reaction, user):
-        return user == interaction.user and str(reaction.emoji) == '✅'
+    def check(payload):
+        return (payload.message_id == confirm_msg.id and payload.user_id == interaction.user.id
+                and str(payload.emoji) == '✅')
 
     try:
         await confirm_msg.add_reaction('✅')
-        reaction, user = await bot.wait_for('reaction_add', timeout=30.0, check=check)
+        await bot.wait_for('raw_reaction_add', timeout=30.0, check=check)
     except asyncio.TimeoutError:
         embed = discord.Embed(
             title="🕒 Purge Canceled",
@@ -523,38 +2149,38 @@ async def purge(interaction: discord.Interaction):
         return await confirm_msg.edit(embed=embed)
 
     try:
-        total_items = len(interaction.guild.channels) + len([r for r in interaction.guild.roles if r.name != "@everyone" and not r.managed])
-        deleted_items = 0
-        
-        for channel in interaction.guild.channels:
-            try:
-                await channel.delete()
-                deleted_items += 1
-                print_progress_bar(deleted_items, total_items, prefix='Purging:', suffix='Complete', length=50)
-                await asyncio.sleep(1)
-            except Exception as e:
-                print(f"{Fore.RED}Error deleting channel: {e}")
-
-        for role in interaction.guild.roles:
-            if role.name != "@everyone" and not role.managed:
+        guild = interaction.guild
+        channels = [channel for channel in guild.channels if channel != interaction.channel]
+        roles = [role for role in guild.roles if not role.is_default() and not role.managed]
+        deletable_roles = [role for role in roles if role < guild.me.top_role]
+        counts = collections.Counter(Skipped=len(roles) - len(deletable_roles))
+        total_items = len(channels) + len(deletable_roles)
+
+        async def report_progress():
+            while True:
+                await asyncio.sleep(PURGE_UPDATE_INTERVAL)
                 try:
-                    await role.delete()
-                    deleted_items += 1
-                    print_progress_bar(deleted_items, total_items, prefix='Purging:', suffix='Complete', length=50)
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    print(f"{Fore.RED}Error deleting role: {e}")
-
-        print()
-        embed = discord.Embed(
-            title="✅ Purge Complete",
-            description="All channels and roles removed",
-            color=0x00ff00
-        )
+                    await confirm_msg.edit(embed=purge_embed("🔥 Purging", counts, total_items, 0xff0000))
+                except discord.HTTPException:
+                    pass
+
+        reporter = asyncio.ensure_future(report_progress())
+        try:
+            await purge_guild(guild, channels, deletable_roles, counts, total_items)
+        finally:
+            reporter.cancel()
+
+        embed = purge_embed("✅ Purge Complete", counts, total_items, 0x00ff00)
+        if interaction.channel in guild.channels:
+            embed.description += "\nThis channel will be deleted in 5 seconds"
         await confirm_msg.edit(embed=embed)
-        await send_webhook_update("Server Purged", 
-                                f"All content removed from {interaction.guild.name}",
-                                color=0x00ff00)
+        send_webhook_update("Server Purged", 
+                          f"All content removed from {guild.name}",
+                          color=0x00ff00,
+                          fields=[(name, str(count)) for name, count in sorted(counts.items())])
+        if interaction.channel in guild.channels:
+            await asyncio.sleep(5)
+            await delete_with_retry(route_key("DELETE", f"/channels/{interaction.channel.id}"), interaction.channel)
 
     except Exception as e:
         embed = discord.Embed(
@@ -563,42 +2189,124 @@ async def purge(interaction: discord.Interaction):
             color=0xff0000
         )
         await confirm_msg.edit(embed=embed)
-        await send_webhook_update("Purge Failed", str(e), 0xff0000)
+        send_webhook_update("Purge Failed", str(e), 0xff0000)
 
-async def clone_server(source_guild, target_guild, progress, log_channel, ignored_channel_ids):
-    global cancel_flag
+def purge_embed(title, counts, total_items, color):
+    done = counts["Channels deleted"] + counts["Roles deleted"] + counts["Failed"]
+    embed = discord.Embed(
+        title=title,
+        description=f"{done}/{total_items} items processed",
+        color=color
+    )
+    for name in ("Channels deleted", "Roles deleted", "Failed", "Skipped"):
+        embed.add_field(name=name, value=str(counts[name]), inline=True)
+    return embed
+
+async def delete_with_retry(route, obj):
+    for attempt in range(PURGE_RETRIES + 1):
+        try:
+            return await run_phase("purge", route, obj.delete)
+        except discord.NotFound:
+            return
+        except (discord.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            transient = not isinstance(e, discord.HTTPException) or e.status >= 500
+            if not transient or attempt == PURGE_RETRIES:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+async def purge_guild(guild, channels, roles, counts, total_items):
+    async def delete(kind, obj, route):
+        try:
+            await delete_with_retry(route, obj)
+            counts[f"{kind}s deleted"] += 1
+        except Exception as e:
+            counts["Failed"] += 1
+            log_action("Purge Error", "FAILED", f"{kind} {obj.name}: {str(e)}", Fore.RED)
+        done = counts["Channels deleted"] + counts["Roles deleted"] + counts["Failed"]
+        if total_items and (done % 10 == 0 or done == total_items):
+            print_progress_bar(done, total_items, prefix='Purging:', suffix='Complete', length=50)
+
+    await asyncio.gather(
+        *(delete("Channel", channel, route_key("DELETE", f"/channels/{channel.id}")) for channel in channels),
+        *(delete("Role", role, route_key("DELETE", f"/guilds/{guild.id}/roles/{role.id}"))
+          for role in sorted(roles, reverse=True))
+    )
+
+async def clone_server(source_guild, targets, ignored_channel_ids, profiler=None):
+    with profile_phase(profiler, "structure"):
+        structures = await asyncio.gather(*(
+            clone_structure(source_guild, target_guild, progress, ignored_channel_ids)
+            for target_guild, progress in targets
+        ))
+
+    with profile_phase(profiler, "assets"):
+        await clone_assets(source_guild, targets, structures)
+    if cancel_requested():
+        raise JobCancelled("Operation cancelled by user")
+
+    message_jobs = {}
+    for (target_guild, progress), (role_mapping, channel_mapping, channel_pairs) in zip(targets, structures):
+        for source_channel, target_channel in channel_pairs:
+            message_jobs.setdefault(source_channel.id, (source_channel, []))[1].append((target_channel, progress))
+    with profile_phase(profiler, "messages"):
+        await asyncio.gather(
+            clone_threads(source_guild, targets, structures, ignored_channel_ids),
+            *(
+                clone_channel_messages(source_channel, destinations)
+                for source_channel, destinations in message_jobs.values()
+            )
+        )
+    with profile_phase(profiler, "checkpoint"):
+        for target_guild, progress in targets:
+            await progress.checkpoint()
+    if cancel_requested():
+        raise JobCancelled("Operation cancelled by user")
+
+    with profile_phase(profiler, "members"):
+        await asyncio.gather(*(
+            clone_members(source_guild, target_guild, progress, role_mapping)
+            for (target_guild, progress), (role_mapping, channel_mapping, channel_pairs) in zip(targets, structures)
+        ))
+    with profile_phase(profiler, "mirror-state"):
+        for (target_guild, progress), (role_mapping, channel_mapping, channel_pairs) in zip(targets, structures):
+            await save_mirror_state(source_guild.id, target_guild.id, role_mapping, channel_mapping, progress.latest_messages())
+
+async def clone_structure(source_guild, target_guild, progress, ignored_channel_ids):
     role_mapping = {}
-    existing_progress = load_clone_progress()
-    
+    created_roles = []
     log_action("Clone Start", "INITIALIZED", 
               f"Source: {source_guild.name} ({source_guild.id})\n"
               f"Target: {target_guild.name} ({target_guild.id})\n"
               f"Ignored Channels: {ignored_channel_ids or 'None'}")
 
+    target_roles = build_name_index(target_guild.roles)
     total_roles = len(source_guild.roles)
     for i, role in enumerate(reversed(source_guild.roles)):
-        if cancel_flag:
+        if cancel_requested():
             log_action("Clone Operation", "CANCELLED", "User requested cancellation", Fore.YELLOW)
-            raise Exception("Operation cancelled by user")
+            raise JobCancelled("Operation cancelled by user")
         if role.is_default():
             continue
         
         if role.id in progress.completed_roles:
-            existing_role = discord.utils.get(target_guild.roles, name=role.name)
+            existing_role = target_roles.get(role.name)
             if existing_role:
                 role_mapping[role.id] = existing_role.id
-                log_action("Role Skip", "EXISTS", f"Skipped existing role: {role.name}", Fore.CYAN)
+                log_action("Role Skip", "EXISTS", f"Skipped existing role: {role.name}", Fore.CYAN, logging.DEBUG)
             continue
         
-        existing_role = discord.utils.get(target_guild.roles, name=role.name)
+        existing_role = target_roles.get(role.name)
         if existing_role:
             role_mapping[role.id] = existing_role.id
-            progress.completed_roles.append(role.id)
-            log_action("Role Match", "EXISTS", f"Matched existing role: {role.name}", Fore.CYAN)
+            progress.complete("roles", role.id, advance=False)
+            log_action("Role Match", "EXISTS", f"Matched existing role: {role.name}", Fore.CYAN, logging.DEBUG)
             continue
 
         try:
-            new_role = await target_guild.create_role(
+            new_role = await run_phase(
+                "roles",
+                route_key("POST", f"/guilds/{target_guild.id}/roles"),
+                target_guild.create_role,
                 name=role.name,
                 permissions=role.permissions,
                 color=role.color,
@@ -606,189 +2314,1369 @@ async def clone_server(source_guild, target_guild, progress, log_channel, ignore
                 mentionable=role.mentionable
             )
             role_mapping[role.id] = new_role.id
-            progress.completed_roles.append(role.id)
-            progress.current_step += 1
-            progress.save()
-            save_clone_progress(progress.to_dict())
+            created_roles.append(new_role)
+            target_roles.setdefault(new_role.name, new_role)
+            progress.complete("roles", role.id)
             
-            log_action("Role Created", "SUCCESS", f"Created role: {role.name}", Fore.GREEN)
+            log_action("Role Created", "SUCCESS", f"Created role: {role.name}", Fore.GREEN, logging.DEBUG)
             print_progress_bar(i+1, total_roles, prefix='Cloning Roles:', suffix=f'{role.name}')
         except Exception as e:
             error_msg = f"Role {role.name}: {str(e)}"
-            progress.errors.append(error_msg)
-            progress.save()
-            save_clone_progress(progress.to_dict())
+            progress.add_error(error_msg)
             log_action("Role Error", "FAILED", error_msg, Fore.RED)
+    finish_progress_bar('Cloning Roles:')
+    await progress.checkpoint()
+    translation = OverwriteTranslation(source_guild, target_guild, role_mapping, created_roles)
+    await translation.load_members(target_guild)
 
     category_mapping = {}
+    channel_mapping = {}
+    target_categories = build_name_index(target_guild.categories)
     total_categories = len(source_guild.categories)
     for i, category in enumerate(source_guild.categories):
-        if cancel_flag:
-            raise Exception("Operation cancelled by user")
+        if cancel_requested():
+            raise JobCancelled("Operation cancelled by user")
         
         if category.id in progress.completed_categories:
-            category_mapping[category.id] = discord.utils.get(target_guild.categories, name=category.name)
+            if category.id in progress.channel_map:
+                category_mapping[category.id] = target_guild.get_channel(progress.channel_map[category.id])
+            else:
+                category_mapping[category.id] = target_categories.get(category.name)
+            if category_mapping[category.id]:
+                channel_mapping[category.id] = category_mapping[category.id].id
             continue
-            
-        overwrites = {}
-        for target, permission in category.overwrites.items():
-            if isinstance(target, discord.Role):
-                if target.id in role_mapping:
-                    overwrites[target_guild.get_role(role_mapping[target.id])] = permission
+
 
         try:
-            new_category = await target_guild.create_category(
+            new_category = await run_phase(
+                "categories",
+                route_key("POST", f"/guilds/{target_guild.id}/channels"),
+                target_guild.create_category,
                 name=category.name,
-                overwrites=overwrites,
-                position=category.position
+                overwrites=translation.translate(category.overwrites)
             )
             category_mapping[category.id] = new_category
-            progress.completed_categories.append(category.id)
-            progress.current_step += 1
-            progress.save()
-            save_clone_progress(progress.to_dict())
+            channel_mapping[category.id] = new_category.id
+            target_categories.setdefault(new_category.name, new_category)
+            progress.map_channel(category.id, new_category.id)
+            progress.complete("categories", category.id)
             
             print_progress_bar(i+1, total_categories, prefix='Cloning Categories:', suffix=f'{category.name}', length=50)
         except Exception as e:
-            progress.errors.append(f"Category {category.name}: {str(e)}")
-            progress.save()
-            save_clone_progress(progress.to_dict())
-
+            progress.add_error(f"Category {category.name}: {str(e)}")
+    finish_progress_bar('Cloning Categories:')
+    await progress.checkpoint()
+
+    channel_route = route_key("POST", f"/guilds/{target_guild.id}/channels")
+    channel_pairs = []
+    target_channels = {}
+    for channel in target_guild.channels:
+        target_channels.setdefault((channel_kind(channel), channel.name), channel)
     total_channels = len(source_guild.channels)
     for i, channel in enumerate(source_guild.channels):
-        if cancel_flag:
-            raise Exception("Operation cancelled by user")
+        if cancel_requested():
+            raise JobCancelled("Operation cancelled by user")
         
         if channel.id in progress.completed_channels:
+            if channel.id in progress.channel_map:
+                existing_channel = target_guild.get_channel(progress.channel_map[channel.id])
+            else:
+                existing_channel = target_channels.get((channel_kind(channel), channel.name))
+            if existing_channel:
+                channel_mapping[channel.id] = existing_channel.id
+                if (channel_kind(channel) == "text" and channel.id not in ignored_channel_ids
+                        and channel.id not in progress.completed_messages):
+                    channel_pairs.append((channel, existing_channel))
             continue
             
-        if isinstance(channel, discord.TextChannel):
+        kind = channel_kind(channel)
+        if kind == "text":
             try:
                 clone_messages = channel.id not in ignored_channel_ids
 
-                new_channel = await target_guild.create_text_channel(
+                new_channel = await run_phase(
+                    "channels",
+                    channel_route,
+                    target_guild.create_text_channel,
                     name=channel.name,
                     category=category_mapping.get(channel.category_id),
-                    position=channel.position,
                     topic=channel.topic,
                     slowmode_delay=channel.slowmode_delay,
-                    overwrites=await clone_overwrites(channel.overwrites, role_mapping, target_guild)
+                    overwrites=translation.translate(channel.overwrites)
                 )
-                progress.completed_channels.append(channel.id)
-                progress.current_step += 1
-                progress.save()
-                save_clone_progress(progress.to_dict())
+                channel_mapping[channel.id] = new_channel.id
+                progress.map_channel(channel.id, new_channel.id)
+                progress.complete("channels", channel.id)
                 
                 print_progress_bar(i+1, total_channels, prefix='Cloning Channels:', suffix=f'{channel.name}', length=50)
 
                 if clone_messages:
-                    await clone_channel_messages(channel, new_channel, progress)
+                    channel_pairs.append((channel, new_channel))
 
             except Exception as e:
-                progress.errors.append(f"Text Channel {channel.name}: {str(e)}")
-                progress.save()
-                save_clone_progress(progress.to_dict())
+                progress.add_error(f"Text Channel {channel.name}: {str(e)}")
 
-        elif isinstance(channel, discord.VoiceChannel):
+        elif kind in ("voice", "stage"):
             try:
-                await target_guild.create_voice_channel(
+                new_channel = await run_phase(
+                    "channels",
+                    channel_route,
+                    target_guild.create_voice_channel if kind == "voice" else target_guild.create_stage_channel,
                     name=channel.name,
                     category=category_mapping.get(channel.category_id),
-                    position=channel.position,
                     bitrate=channel.bitrate,
-                    user_limit=channel.user_limit
+                    user_limit=channel.user_limit,
+                    overwrites=translation.translate(channel.overwrites)
                 )
-                progress.completed_channels.append(channel.id)
-                progress.current_step += 1
-                progress.save()
-                save_clone_progress(progress.to_dict())
+                channel_mapping[channel.id] = new_channel.id
+                progress.map_channel(channel.id, new_channel.id)
+                progress.complete("channels", channel.id)
                 
                 print_progress_bar(i+1, total_channels, prefix='Cloning Channels:', suffix=f'{channel.name}', length=50)
             except Exception as e:
-                progress.errors.append(f"Voice Channel {channel.name}: {str(e)}")
-                progress.save()
-                save_clone_progress(progress.to_dict())
-
-    total_members = len(source_guild.members)
-    for i, member in enumerate(source_guild.members):
-        if cancel_flag:
-            raise Exception("Operation cancelled by user")
-            
-        try:
-            target_member = target_guild.get_member(member.id)
-            if target_member:
-                roles = [target_guild.get_role(role_mapping[role.id]) for role in member.roles 
-                        if role.id in role_mapping and not role.is_default()]
-                await target_member.edit(roles=roles)
-                progress.current_step += 1
-                progress.save()
-                save_clone_progress(progress.to_dict())
+                progress.add_error(f"{kind.title()} Channel {channel.name}: {str(e)}")
+
+        elif kind == "forum":
+            try:
+                new_channel = await run_phase(
+                    "channels",
+                    channel_route,
+                    target_guild.create_forum,
+                    name=channel.name,
+                    category=category_mapping.get(channel.category_id),
+                    topic=channel.topic,
+                    slowmode_delay=channel.slowmode_delay,
+                    nsfw=channel.nsfw,
+                    default_auto_archive_duration=channel.default_auto_archive_duration,
+                    available_tags=forum_tags(channel),
+                    overwrites=translation.translate(channel.overwrites)
+                )
+                channel_mapping[channel.id] = new_channel.id
+                progress.map_channel(channel.id, new_channel.id)
+                progress.complete("channels", channel.id)
                 
-                if i % 10 == 0:
-                    print_progress_bar(i+1, total_members, prefix='Updating Members:', suffix=f'{member.name}', length=50)
+                print_progress_bar(i+1, total_channels, prefix='Cloning Channels:', suffix=f'{channel.name}', length=50)
+            except Exception as e:
+                progress.add_error(f"Forum Channel {channel.name}: {str(e)}")
+
+    finish_progress_bar('Cloning Channels:')
+    await finalize_positions(source_guild, target_guild, role_mapping, channel_mapping, progress)
+    await progress.checkpoint()
+    return role_mapping, channel_mapping, channel_pairs
+
+def role_positions(source_guild, target_guild, role_mapping):
+    cloned = list(dict.fromkeys(
+        role_mapping[role.id] for role in sorted(source_guild.roles, key=lambda role: role.position)
+        if role.id in role_mapping and not role.is_default()
+    ))
+    if target_guild.me is None:
+        return {}
+    cloned_ids = set(cloned)
+    others = [role.id for role in target_guild.roles if not role.is_default() and role.id not in cloned_ids]
+    top_position = target_guild.me.top_role.position
+    positions = {}
+    unchanged = True
+    for role_id in others + cloned:
+        role = target_guild.get_role(role_id)
+        if role is None:
+            if role_id in cloned_ids:
+                positions[role_id] = len(positions) + 1
+                unchanged = False
+        elif not role.managed and role.position < top_position:
+            positions[role_id] = len(positions) + 1
+            unchanged = unchanged and role.position == positions[role_id]
+    if unchanged:
+        return {}
+    return positions
+
+def channel_positions(source_guild, target_guild, channel_mapping):
+    positions = []
+    unchanged = True
+    for channel in source_guild.channels:
+        target_id = channel_mapping.get(channel.id)
+        if target_id is None:
+            continue
+        positions.append({"id": target_id, "position": channel.position})
+        target_channel = target_guild.get_channel(target_id)
+        if target_channel is None or target_channel.position != channel.position:
+            unchanged = False
+    if unchanged:
+        return []
+    return positions
+
+async def finalize_positions(source_guild, target_guild, role_mapping, channel_mapping, progress):
+    updates = 0
+    positions = role_positions(source_guild, target_guild, role_mapping)
+    if positions:
+        try:
+            await run_phase(
+                "positions",
+                route_key("PATCH", f"/guilds/{target_guild.id}/roles"),
+                target_guild.edit_role_positions,
+                positions={discord.Object(id=role_id): position for role_id, position in positions.items()}
+            )
+            updates += 1
         except Exception as e:
-            progress.errors.append(f"Member {member.name}: {str(e)}")
-            progress.save()
-            save_clone_progress(progress.to_dict())
+            progress.add_error(f"Role positions: {str(e)}")
 
-async def clone_overwrites(overwrites, role_mapping, target_guild):
-    new_overwrites = {}
-    for target, overwrite in overwrites.items():
-        if isinstance(target, discord.Role):
-            if target.id in role_mapping:
-                new_role = target_guild.get_role(role_mapping[target.id])
-                if new_role:
-                    new_overwrites[new_role] = overwrite
-        elif isinstance(target, discord.Member):
-            new_member = target_guild.get_member(target.id)
-            if new_member:
-                new_overwrites[new_member] = overwrite
-    return new_overwrites
-
-async def clone_channel_messages(source_channel, target_channel, progress):
+    positions = channel_positions(source_guild, target_guild, channel_mapping)
+    if positions:
+        try:
+            await run_phase(
+                "positions",
+                route_key("PATCH", f"/guilds/{target_guild.id}/channels"),
+                target_guild._state.http.bulk_channel_update,
+                target_guild.id,
+                positions
+            )
+            updates += 1
+        except Exception as e:
+            progress.add_error(f"Channel positions: {str(e)}")
+
+    if updates:
+        log_action("Positions", "FINALIZED", f"Target: {target_guild.name}\nBulk updates: {updates}")
+    return updates
+
+async def member_chunks(guild):
+    if isinstance(guild, SnapshotGuild):
+        for start in range(0, len(guild.members), MEMBER_CHUNK_SIZE):
+            yield guild.members[start:start + MEMBER_CHUNK_SIZE]
+        return
+    chunk = []
+    async for member in guild.fetch_members(limit=None):
+        chunk.append(member)
+        if len(chunk) == MEMBER_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def query_member_chunk(guild, member_ids):
+    if isinstance(guild, SnapshotGuild):
+        return [member for member in map(guild.get_member, member_ids) if member]
+    return await guild.query_members(user_ids=member_ids, limit=len(member_ids), cache=False)
+
+async def edit_member_roles(target_guild, target_member, role_ids, progress):
     try:
-        message_count = 0
-        async for message in source_channel.history(limit=500, oldest_first=True):
-            if progress.current_step % 10 == 0 and cancel_flag:
-                raise Exception("Operation cancelled by user")
-            
-            files = []
-            for attachment in message.attachments:
-                files.append(await attachment.to_file())
-            
-            reference = None
-            if message.reference and message.reference.message_id:
+        await run_phase(
+            "members",
+            route_key("PATCH", f"/guilds/{target_guild.id}/members/{target_member.id}"),
+            target_member.edit,
+            roles=[discord.Object(id=role_id) for role_id in role_ids]
+        )
+        progress.advance()
+        return True
+    except Exception as e:
+        progress.add_error(f"Member {target_member.name}: {str(e)}")
+        return False
+
+def asset_kind(asset):
+    return "emojis" if isinstance(asset, discord.Emoji) else "stickers"
+
+def read_asset(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+async def existing_asset_digests(assets):
+    digests = collections.defaultdict(set)
+    results = await asyncio.gather(*(attachment_cache.fetch(asset) for asset in assets), return_exceptions=True)
+    for asset, digest in zip(assets, results):
+        if not isinstance(digest, Exception):
+            digests[(asset_kind(asset), asset.name)].add(digest)
+            attachment_cache.release(digest)
+    return digests
+
+async def upload_asset(asset, digest, target_guild, role_mapping):
+    path = attachment_cache.path(digest)
+    if asset_kind(asset) == "emojis":
+        image = await asyncio.to_thread(read_asset, path)
+        await run_phase(
+            "assets",
+            route_key("POST", f"/guilds/{target_guild.id}/emojis"),
+            target_guild.create_custom_emoji,
+            name=asset.name,
+            image=image,
+            roles=[discord.Object(id=role_mapping[role.id]) for role in asset.roles if role.id in role_mapping]
+        )
+    else:
+        await run_phase(
+            "assets",
+            route_key("POST", f"/guilds/{target_guild.id}/stickers"),
+            target_guild.create_sticker,
+            name=asset.name,
+            description=asset.description or "",
+            emoji=asset.emoji,
+            file=discord.File(path, filename=f"{asset.name}.{asset.format.file_extension}")
+        )
+
+async def upload_assets(assets, digests, target_guild, progress, role_mapping):
+    pending = [
+        asset for asset in assets
+        if asset.id in digests and asset.id not in getattr(progress, f"completed_{asset_kind(asset)}")
+    ]
+    names = {(asset_kind(asset), asset.name) for asset in pending}
+    existing = await existing_asset_digests([
+        asset for asset in (*target_guild.emojis, *target_guild.stickers)
+        if (asset_kind(asset), asset.name) in names
+    ])
+
+    uploaded = []
+
+    async def clone_asset(asset):
+        if cancel_requested():
+            return
+        if digests[asset.id] not in existing[(asset_kind(asset), asset.name)]:
+            await upload_asset(asset, digests[asset.id], target_guild, role_mapping)
+            uploaded.append(asset)
+        progress.complete(asset_kind(asset), asset.id)
+        print_progress_bar(progress.current_step, progress.total_steps, prefix='Cloning Assets:', suffix=asset.name, length=50)
+
+    results = await asyncio.gather(*(clone_asset(asset) for asset in pending), return_exceptions=True)
+    for asset, result in zip(pending, results):
+        if isinstance(result, Exception):
+            progress.add_error(f"Asset {asset.name}: {str(result)}")
+    finish_progress_bar('Cloning Assets:')
+    log_action("Assets", "CLONED", 
+              f"Target: {target_guild.name}\nUploaded: {len(uploaded)}\nAlready present: {len(pending) - len(uploaded)}")
+
+async def clone_assets(source_guild, targets, structures):
+    assets = [
+        asset for asset in (*source_guild.emojis, *source_guild.stickers)
+        if any(asset.id not in getattr(progress, f"completed_{asset_kind(asset)}") for target_guild, progress in targets)
+    ]
+    if not assets:
+        return
+    results = await asyncio.gather(*(attachment_cache.fetch(asset) for asset in assets), return_exceptions=True)
+    digests = {}
+    for asset, result in zip(assets, results):
+        if isinstance(result, Exception):
+            for target_guild, progress in targets:
+                progress.add_error(f"Asset {asset.name}: {str(result)}")
+        else:
+            digests[asset.id] = result
+    try:
+        await asyncio.gather(*(
+            upload_assets(assets, digests, target_guild, progress, role_mapping)
+            for (target_guild, progress), (role_mapping, channel_mapping, channel_pairs) in zip(targets, structures)
+        ))
+    finally:
+        for digest in digests.values():
+            attachment_cache.release(digest)
+        await attachment_cache.save_index()
+
+async def clone_members(source_guild, target_guild, progress, role_mapping):
+    iterate_target = (
+        not isinstance(source_guild, SnapshotGuild)
+        and (target_guild.member_count or 0) < (source_guild.member_count or 0)
+    )
+    outer, inner = (target_guild, source_guild) if iterate_target else (source_guild, target_guild)
+    total_members = len(outer.members) if isinstance(outer, SnapshotGuild) else outer.member_count or 0
+    checked = matched = updated = 0
+    async for chunk in member_chunks(outer):
+        if cancel_requested():
+            raise JobCancelled("Operation cancelled by user")
+
+        others = {member.id: member for member in await query_member_chunk(inner, [member.id for member in chunk])}
+        edits = []
+        for member in chunk:
+            other = others.get(member.id)
+            if other is None:
+                continue
+            source_member, target_member = (other, member) if iterate_target else (member, other)
+            desired = {role_mapping[role.id] for role in source_member.roles
+                       if role.id in role_mapping and not role.is_default()}
+            desired.update(role.id for role in target_member.roles if role.managed)
+            current = {role.id for role in target_member.roles if not role.is_default()}
+            if desired != current:
+                edits.append(edit_member_roles(target_guild, target_member, desired, progress))
+        checked += len(chunk)
+        matched += len(others)
+        updated += sum(await asyncio.gather(*edits))
+        print_progress_bar(checked, max(checked, total_members), prefix='Updating Members:', suffix=f'{updated} updated', length=50)
+
+    finish_progress_bar('Updating Members:')
+    log_action("Member Roles", "SYNCED", 
+              f"Target: {target_guild.name}\nChecked: {checked}\nShared: {matched}\nUpdated: {updated}")
+    await progress.checkpoint()
+
+def changed_fields(obj, fields):
+    return {name: value for name, value in fields.items() if getattr(obj, name) != value}
+
+async def latest_message_id(channel):
+    async for message in channel.history(limit=1, oldest_first=False):
+        return message.id
+    return None
+
+async def sync_server(source_guild, target_guild, progress, ignored_channel_ids):
+    state = await asyncio.to_thread(load_mirror_state, source_guild.id, target_guild.id)
+    role_mapping = state.get("roles", {})
+    channel_mapping = state.get("channels", {})
+    last_messages = state.get("last_messages", {})
+    journaled = await load_clone_progress(progress.journal)
+    for source_id, target_id in journaled.get("channel_map", {}).items():
+        channel_mapping[int(source_id)] = target_id
+    for channel_id, cursor in journaled.get("message_cursors", {}).items():
+        last_messages[int(channel_id)] = max(last_messages.get(int(channel_id)) or 0, cursor[0])
+    stats = collections.Counter()
+    log_action("Mirror Start", "INITIALIZED", 
+              f"Source: {source_guild.name} ({source_guild.id})\n"
+              f"Target: {target_guild.name} ({target_guild.id})\n"
+              f"Last sync: {format_time_ago(state.get('synced_at', 0))}")
+
+    target_roles = {role.id: role for role in target_guild.roles}
+    target_role_names = build_name_index(target_guild.roles)
+    source_role_ids = set()
+    created_roles = []
+    for role in reversed(source_guild.roles):
+        if cancel_requested():
+            raise JobCancelled("Operation cancelled by user")
+        if role.is_default():
+            continue
+        source_role_ids.add(role.id)
+        fields = {
+            "name": role.name,
+            "permissions": role.permissions,
+            "color": role.color,
+            "hoist": role.hoist,
+            "mentionable": role.mentionable
+        }
+        target_role = target_roles.get(role_mapping.get(role.id)) or target_role_names.get(role.name)
+        try:
+            if target_role is None:
+                target_role = await run_phase(
+                    "mirror",
+                    route_key("POST", f"/guilds/{target_guild.id}/roles"),
+                    target_guild.create_role,
+                    **fields
+                )
+                created_roles.append(target_role)
+                stats["Roles created"] += 1
+            elif not target_role.managed:
+                changes = changed_fields(target_role, fields)
+                if changes:
+                    await run_phase(
+                        "mirror",
+                        route_key("PATCH", f"/guilds/{target_guild.id}/roles/{target_role.id}"),
+                        target_role.edit,
+                        **changes
+                    )
+                    stats["Roles updated"] += 1
+            role_mapping[role.id] = target_role.id
+        except Exception as e:
+            progress.add_error(f"Role {role.name}: {str(e)}")
+
+    for source_id, target_id in list(role_mapping.items()):
+        if source_id in source_role_ids:
+            continue
+        del role_mapping[source_id]
+        target_role = target_roles.get(target_id)
+        if target_role and not target_role.is_default() and not target_role.managed:
+            try:
+                await run_phase(
+                    "mirror",
+                    route_key("DELETE", f"/guilds/{target_guild.id}/roles/{target_id}"),
+                    target_role.delete
+                )
+                stats["Roles deleted"] += 1
+            except Exception as e:
+                progress.add_error(f"Role {target_role.name}: {str(e)}")
+
+    translation = OverwriteTranslation(source_guild, target_guild, role_mapping, created_roles)
+    await translation.load_members(target_guild)
+    target_channels = {channel.id: channel for channel in target_guild.channels}
+    target_channel_names = {}
+    for channel in target_guild.channels:
+        target_channel_names.setdefault((channel_kind(channel), channel.name), channel)
+    channel_route = route_key("POST", f"/guilds/{target_guild.id}/channels")
+    creators = {
+        "category": target_guild.create_category,
+        "text": target_guild.create_text_channel,
+        "voice": target_guild.create_voice_channel,
+        "stage": target_guild.create_stage_channel,
+        "forum": target_guild.create_forum
+    }
+    source_channels = sorted(
+        (channel for channel in source_guild.channels if channel_kind(channel) in creators),
+        key=lambda channel: channel_kind(channel) != "category"
+    )
+    source_channel_ids = set()
+    message_jobs = []
+    for channel in source_channels:
+        if cancel_requested():
+            raise JobCancelled("Operation cancelled by user")
+        kind = channel_kind(channel)
+        source_channel_ids.add(channel.id)
+        fields = {
+            "name": channel.name,
+            "overwrites": translation.translate(channel.overwrites)
+        }
+        if kind != "category":
+            fields["category"] = target_channels.get(channel_mapping.get(channel.category_id))
+        if kind in ("text", "forum"):
+            fields.update(topic=channel.topic, slowmode_delay=channel.slowmode_delay)
+        elif kind in ("voice", "stage"):
+            fields.update(bitrate=channel.bitrate, user_limit=channel.user_limit)
+        target_channel = target_channels.get(channel_mapping.get(channel.id)) or target_channel_names.get((kind, channel.name))
+        if target_channel and kind == "text" and channel.id not in last_messages:
+            try:
+                last_messages[channel.id] = await latest_message_id(channel)
+            except discord.HTTPException as e:
+                progress.add_error(f"Channel {channel.name}: {str(e)}")
+                continue
+        try:
+            if target_channel is None:
+                target_channel = await run_phase("mirror", channel_route, creators[kind], **fields)
+                target_channels[target_channel.id] = target_channel
+                progress.map_channel(channel.id, target_channel.id)
+                stats["Channels created"] += 1
+            else:
+                changes = changed_fields(target_channel, fields)
+                if changes:
+                    await run_phase(
+                        "mirror",
+                        route_key("PATCH", f"/channels/{target_channel.id}"),
+                        target_channel.edit,
+                        **changes
+                    )
+                    stats["Channels updated"] += 1
+            channel_mapping[channel.id] = target_channel.id
+        except Exception as e:
+            progress.add_error(f"Channel {channel.name}: {str(e)}")
+            continue
+
+        if kind == "text" and channel.id not in ignored_channel_ids:
+            message_jobs.append(clone_channel_messages(
+                channel, [(target_channel, progress)], after=last_messages.get(channel.id)))
+
+    for source_id, target_id in list(channel_mapping.items()):
+        if source_id in source_channel_ids:
+            continue
+        del channel_mapping[source_id]
+        last_messages.pop(source_id, None)
+        target_channel = target_channels.get(target_id)
+        if target_channel:
+            try:
+                await run_phase(
+                    "mirror",
+                    route_key("DELETE", f"/channels/{target_id}"),
+                    target_channel.delete
+                )
+                stats["Channels deleted"] += 1
+            except Exception as e:
+                progress.add_error(f"Channel {target_channel.name}: {str(e)}")
+
+    position_updates = await finalize_positions(source_guild, target_guild, role_mapping, channel_mapping, progress)
+    if position_updates:
+        stats["Position updates"] += position_updates
+
+    await asyncio.gather(*message_jobs)
+    latest = progress.latest_messages()
+    for channel_id, message_id in latest.items():
+        stats["Messages sent"] += progress.message_count(channel_id)
+        last_messages[channel_id] = message_id
+    if progress.errors:
+        stats["Errors"] = len(progress.errors)
+    await save_mirror_state(source_guild.id, target_guild.id, role_mapping, channel_mapping, last_messages)
+    if cancel_requested():
+        raise JobCancelled("Operation cancelled by user")
+    log_action("Mirror Complete", "SUCCESS", "\n".join(f"{name}: {count}" for name, count in stats.items()) or "No changes", Fore.GREEN)
+    return stats
+
+def overwrite_key(overwrites):
+    return frozenset(
+        (overwrite_kind(target), target.id, *(permissions.value for permissions in overwrite.pair()))
+        for target, overwrite in overwrites.items()
+    )
+
+class OverwriteTranslation:
+    def __init__(self, source_guild, target_guild, role_mapping, created_roles=()):
+        self.targets = {}
+        self.cache = {}
+        roles = {role.id: role for role in created_roles}
+        for source_id, target_id in role_mapping.items():
+            role = roles.get(target_id) or target_guild.get_role(target_id)
+            if role:
+                self.targets[("role", source_id)] = role
+            else:
+                log_action("Overwrite Role", "MISSING", f"Role {target_id} is not in {target_guild.name}", Fore.YELLOW)
+        self.missing_members = []
+        for channel in source_guild.channels:
+            for target in channel.overwrites:
+                key = (overwrite_kind(target), target.id)
+                if key[0] == "member" and key not in self.targets:
+                    self.targets[key] = target_guild.get_member(target.id)
+                    if self.targets[key] is None:
+                        self.missing_members.append(target.id)
+
+    async def load_members(self, target_guild):
+        for start in range(0, len(self.missing_members), MEMBER_CHUNK_SIZE):
+            for member in await query_member_chunk(target_guild, self.missing_members[start:start + MEMBER_CHUNK_SIZE]):
+                self.targets[("member", member.id)] = member
+        self.missing_members = []
+
+    def translate(self, overwrites):
+        key = overwrite_key(overwrites)
+        translated = self.cache.get(key)
+        if translated is None:
+            translated = self.cache[key] = {}
+            for target, overwrite in overwrites.items():
+                new_target = self.targets.get((overwrite_kind(target), target.id))
+                if new_target:
+                    translated[new_target] = overwrite
+        return translated
+
+async def clone_channel_messages(source_channel, destinations, after=None):
+    queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+    reader_errors = []
+    message_queues.add(queue)
+    limit = message_history_limit
+    destinations = [
+        (target_channel, progress, route_key("POST", f"/channels/{target_channel.id}/messages"),
+         progress.message_map.setdefault(source_channel.id, {}))
+        for target_channel, progress in destinations
+    ]
+    cursors = [max(after or 0, progress.message_cursor(source_channel.id) or 0)
+               for target_channel, progress, message_route, sent_messages in destinations]
+    read_after = min(cursors, default=0)
+    read_limit = None
+    if limit:
+        read_limit = max((limit - progress.message_count(source_channel.id)
+                          for target_channel, progress, message_route, sent_messages in destinations), default=0)
+    message_count = 0
+
+    async def send_to_target(message, digests, target_channel, progress, message_route, sent_messages):
+        if message.id <= max(after or 0, progress.message_cursor(source_channel.id) or 0):
+            return
+        if limit and progress.message_count(source_channel.id) >= limit:
+            return
+        reference = None
+        if message.reference and message.reference.channel_id == source_channel.id:
+            target_id = sent_messages.get(message.reference.message_id)
+            if target_id:
+                reference = discord.MessageReference(
+                    message_id=target_id,
+                    channel_id=target_channel.id,
+                    fail_if_not_exists=False
+                )
+
+        files = attachment_cache.to_files(message.attachments, digests)
+        if not (message.content or message.embeds or files):
+            return
+        sent = await run_phase(
+            "messages",
+            message_route,
+            target_channel.send,
+            content=message.content,
+            files=files,
+            embeds=message.embeds,
+            reference=reference
+        )
+        progress.map_message(source_channel.id, message.id, sent.id)
+        progress.advance()
+
+    async def send_cloned_message(message, prefetch):
+        nonlocal message_count
+        if message_count % 10 == 0 and cancel_requested():
+            attachment_cache.discard(prefetch)
+            raise JobCancelled("Operation cancelled by user")
+
+        digests = await prefetch if prefetch else []
+        try:
+            results = await asyncio.gather(
+                *(send_to_target(message, digests, *destination) for destination in destinations),
+                return_exceptions=True
+            )
+        finally:
+            for digest in digests:
+                if digest:
+                    attachment_cache.release(digest)
+        for destination, result in list(zip(destinations, results)):
+            if isinstance(result, Exception):
+                destination[1].add_error(f"Messages in {source_channel.name}: {str(result)}")
+                destinations.remove(destination)
+        message_count += 1
+        
+        if message_count % 10 == 0:
+            print_progress_bar(message_count, read_limit or message_count + 1,
+                               prefix=f'Cloning Messages in {source_channel.name}:', suffix=f'{message_count} messages', length=50)
+        if message_count % CHECKPOINT_COMPACT_MESSAGES == 0:
+            for progress in {destination[1] for destination in destinations}:
+                await progress.checkpoint()
+
+    async def read_history():
+        if read_limit == 0:
+            await queue.put(None)
+            return
+        try:
+            history = source_channel.history(
+                limit=read_limit,
+                after=discord.Object(id=read_after) if read_after else None,
+                oldest_first=True
+            )
+            async for message in history:
+                prefetch = attachment_cache.prefetch(message.attachments)
                 try:
-                    referenced_msg = await source_channel.fetch_message(message.reference.message_id)
-                    if referenced_msg:
-                        reference = discord.MessageReference(
-                            message_id=referenced_msg.id,
-                            channel_id=target_channel.id,
-                            fail_if_not_exists=False
-                        )
-                except Exception as e:
-                    log_action("Reference Error", "WARNING", f"Could not clone reference: {str(e)}", Fore.YELLOW)
-
-            await target_channel.send(
-                content=message.content,
+                    await queue.put((message, prefetch))
+                except asyncio.CancelledError:
+                    attachment_cache.discard(prefetch)
+                    raise
+        except Exception as e:
+            reader_errors.append(e)
+        await queue.put(None)
+
+    async with request_scheduler.channel_slots.slot(current_job.get()):
+        reader = asyncio.ensure_future(read_history())
+        try:
+            while destinations:
+                item = await queue.get()
+                if item is None:
+                    break
+                await send_cloned_message(*item)
+            if reader_errors:
+                raise reader_errors[0]
+            for target_channel, progress, message_route, sent_messages in destinations:
+                progress.complete("messages", source_channel.id, advance=False)
+        except JobCancelled:
+            log_action("Messages", "CANCELLED", f"Stopped copying {source_channel.name}", Fore.YELLOW, logging.DEBUG)
+        except Exception as e:
+            for target_channel, progress, message_route, sent_messages in destinations:
+                progress.add_error(f"Messages in {source_channel.name}: {str(e)}")
+        finally:
+            reader.cancel()
+            message_queues.discard(queue)
+            finish_progress_bar(f'Cloning Messages in {source_channel.name}:')
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item:
+                    attachment_cache.discard(item[1])
+            await attachment_cache.save_index()
+
+def forum_tags(channel):
+    return [
+        discord.ForumTag(name=tag.name, emoji=tag.emoji if tag.emoji and not tag.emoji.id else None, moderated=tag.moderated)
+        for tag in channel.available_tags
+    ]
+
+async def archived_threads(channel):
+    threads = []
+    async with request_scheduler.channel_slots.slot(current_job.get()):
+        try:
+            async for thread in channel.archived_threads(limit=None):
+                threads.append(thread)
+            if channel_kind(channel) == "text":
+                async for thread in channel.archived_threads(private=True, limit=None):
+                    threads.append(thread)
+        except discord.HTTPException as e:
+            log_action("Archived Threads", "WARNING", f"#{channel.name}: {str(e)}", Fore.YELLOW)
+    return threads
+
+async def source_threads(source_guild, parents):
+    parent_ids = {parent.id for parent in parents}
+    try:
+        active = await source_guild.active_threads()
+    except discord.HTTPException as e:
+        log_action("Active Threads", "WARNING", str(e), Fore.YELLOW)
+        active = []
+    archived = await asyncio.gather(*(archived_threads(parent) for parent in parents))
+    threads = {thread.id: thread for thread in active if thread.parent_id in parent_ids}
+    for thread in itertools.chain.from_iterable(archived):
+        threads.setdefault(thread.id, thread)
+    return sorted(threads.values(), key=lambda thread: thread.id)
+
+async def thread_starter(thread):
+    try:
+        return thread.starter_message or await thread.fetch_message(thread.id)
+    except discord.HTTPException:
+        return None
+
+async def clone_thread(thread, target_guild, progress, channel_mapping):
+    if thread.id in progress.completed_threads:
+        target_id = progress.thread_map.get(thread.id)
+        if target_id is None or thread.id in progress.completed_messages:
+            return None
+        return target_guild.get_thread(target_id) or await target_guild.fetch_channel(target_id)
+
+    parent = target_guild.get_channel(channel_mapping.get(thread.parent_id))
+    if parent is None:
+        return None
+    route = route_key("POST", f"/channels/{parent.id}/threads")
+    if channel_kind(parent) == "forum":
+        tags = {tag.name: tag for tag in parent.available_tags}
+        starter = await thread_starter(thread)
+        attachments = starter.attachments if starter else []
+        digests = await attachment_cache.fetch_all(attachments) if attachments else []
+        try:
+            files = attachment_cache.to_files(attachments, digests)
+            embeds = starter.embeds if starter else []
+            content = starter.content if starter else None
+            created = await run_phase(
+                "threads",
+                route,
+                parent.create_thread,
+                name=thread.name,
+                content=content if content or embeds or files else thread.name,
+                embeds=embeds,
                 files=files,
-                embeds=message.embeds,
-                reference=reference
+                auto_archive_duration=thread.auto_archive_duration,
+                slowmode_delay=thread.slowmode_delay,
+                applied_tags=[tags[tag.name] for tag in thread.applied_tags if tag.name in tags]
             )
-            message_count += 1
-            progress.current_step += 1
-            progress.save()
-            save_clone_progress(progress.to_dict())
-            
-            if message_count % 10 == 0:
-                print_progress_bar(message_count, 500, prefix=f'Cloning Messages in {source_channel.name}:', suffix='Complete', length=50)
-            
-            await asyncio.sleep(1)
-    except Exception as e:
-        progress.errors.append(f"Messages in {source_channel.name}: {str(e)}")
-        progress.save()
-        save_clone_progress(progress.to_dict())
+        finally:
+            for digest in digests:
+                if digest:
+                    attachment_cache.release(digest)
+        new_thread = created.thread
+    else:
+        new_thread = await run_phase(
+            "threads",
+            route,
+            parent.create_thread,
+            name=thread.name,
+            type=thread.type,
+            invitable=thread.invitable,
+            auto_archive_duration=thread.auto_archive_duration,
+            slowmode_delay=thread.slowmode_delay
+        )
+    progress.map_thread(thread.id, new_thread.id)
+    progress.complete("threads", thread.id)
+    print_progress_bar(progress.current_step, progress.total_steps, prefix='Cloning Threads:', suffix=thread.name, length=50)
+    return new_thread
+
+async def close_thread(thread, target_thread):
+    if thread.archived or thread.locked:
+        await run_phase(
+            "threads",
+            route_key("PATCH", f"/channels/{target_thread.id}"),
+            target_thread.edit,
+            archived=thread.archived,
+            locked=thread.locked
+        )
 
-load_config()
+async def clone_threads(source_guild, targets, structures, ignored_channel_ids):
+    if isinstance(source_guild, SnapshotGuild):
+        return
+    parents = [
+        channel for channel in source_guild.channels
+        if channel_kind(channel) in ("text", "forum") and channel.id not in ignored_channel_ids
+    ]
+    threads = [thread for thread in await source_threads(source_guild, parents) if thread.id not in ignored_channel_ids]
+    if not threads:
+        return
+    log_action("Threads", "FOUND", f"{len(threads)} threads in {len(parents)} channels of {source_guild.name}")
 
-bot.run("ur bot token")
+    message_jobs = {thread.id: (thread, []) for thread in threads}
+
+    async def create_threads(target_guild, progress, channel_mapping):
+        progress.total_steps += sum(thread.id not in progress.completed_threads for thread in threads)
+        results = await asyncio.gather(
+            *(clone_thread(thread, target_guild, progress, channel_mapping) for thread in threads),
+            return_exceptions=True
+        )
+        for thread, result in zip(threads, results):
+            if isinstance(result, Exception):
+                progress.add_error(f"Thread {thread.name}: {str(result)}")
+            elif result is not None:
+                message_jobs[thread.id][1].append((result, progress))
+        finish_progress_bar('Cloning Threads:')
+        await progress.checkpoint()
+
+    await asyncio.gather(*(
+        create_threads(target_guild, progress, channel_mapping)
+        for (target_guild, progress), (role_mapping, channel_mapping, channel_pairs) in zip(targets, structures)
+    ))
+    if cancel_requested():
+        return
+
+    async def clone_thread_messages(thread, destinations):
+        await clone_channel_messages(thread, destinations, after=thread.id)
+        results = await asyncio.gather(
+            *(close_thread(thread, target_thread) for target_thread, progress in destinations),
+            return_exceptions=True
+        )
+        for (target_thread, progress), result in zip(destinations, results):
+            if isinstance(result, Exception):
+                progress.add_error(f"Thread {thread.name}: {str(result)}")
+
+    await asyncio.gather(*(
+        clone_thread_messages(thread, destinations)
+        for thread, destinations in message_jobs.values() if destinations
+    ))
+
+def channel_kind(channel):
+    if isinstance(channel, SnapshotChannel):
+        return channel.kind
+    if isinstance(channel, discord.TextChannel):
+        return "text"
+    if isinstance(channel, discord.VoiceChannel):
+        return "voice"
+    if isinstance(channel, discord.StageChannel):
+        return "stage"
+    if isinstance(channel, discord.ForumChannel):
+        return "forum"
+    if isinstance(channel, discord.CategoryChannel):
+        return "category"
+    return None
+
+def overwrite_kind(target):
+    if isinstance(target, SnapshotTarget):
+        return target.kind
+    if isinstance(target, discord.Object):
+        if target.type is discord.Role:
+            return "role"
+        if target.type in (discord.User, discord.Member):
+            return "member"
+        return None
+    if isinstance(target, discord.Role):
+        return "role"
+    if isinstance(target, discord.Member):
+        return "member"
+    return None
+
+def parse_channel_ids(text):
+    if not text:
+        return []
+    return [int(cid.strip()) for cid in text.split(',')]
+
+def encode_snapshot_records(records):
+    return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode()
+
+class SnapshotWriter:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path + ".tmp", "wb")
+        self.member = None
+        self.index = {}
+
+    def begin(self, name):
+        self.index[name] = self.file.tell()
+        self.member = gzip.GzipFile(fileobj=self.file, mode="wb", mtime=0)
+
+    def write(self, records):
+        self.member.write(encode_snapshot_records(records))
+
+    def end(self):
+        self.write([{"type": "end"}])
+        self.member.close()
+        self.member = None
+
+    def close(self):
+        index_offset = self.file.tell()
+        self.begin("index")
+        self.write([{"type": "index", "version": SNAPSHOT_VERSION, "members": self.index}])
+        self.end()
+        self.file.write(gzip.compress(SNAPSHOT_FOOTER % index_offset, compresslevel=0, mtime=0))
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def abort(self):
+        if self.member:
+            self.member.close()
+        self.file.close()
+        os.remove(self.path + ".tmp")
+
+def iter_snapshot_member(f, offset):
+    f.seek(offset)
+    with gzip.GzipFile(fileobj=f, mode="rb") as member:
+        for line in member:
+            record = json.loads(line)
+            if record["type"] == "end":
+                return
+            yield record
+
+def read_snapshot_index(path):
+    footer_size = len(gzip.compress(SNAPSHOT_FOOTER % 0, compresslevel=0, mtime=0))
+    with open(path, "rb") as f:
+        f.seek(-footer_size, os.SEEK_END)
+        footer = json.loads(gzip.decompress(f.read()))
+        index = next(iter_snapshot_member(f, footer["index"]))
+    if index.get("version") != SNAPSHOT_VERSION:
+        raise Exception(f"Unsupported snapshot version: {index.get('version')}")
+    return index["members"]
+
+def read_snapshot_structure(path):
+    members = read_snapshot_index(path)
+    with open(path, "rb") as f:
+        return members, list(iter_snapshot_member(f, members["structure"]))
+
+def overwrite_records(overwrites):
+    records = []
+    for target, overwrite in overwrites.items():
+        kind = overwrite_kind(target)
+        if kind:
+            allow, deny = overwrite.pair()
+            records.append({"id": target.id, "kind": kind, "allow": allow.value, "deny": deny.value})
+    return records
+
+def structure_records(guild):
+    records = [{"type": "guild", "id": guild.id, "name": guild.name}]
+    for role in guild.roles:
+        records.append({
+            "type": "role", "id": role.id, "name": role.name, "permissions": role.permissions.value,
+            "color": role.color.value, "hoist": role.hoist, "mentionable": role.mentionable,
+            "position": role.position, "managed": role.managed, "default": role.is_default()
+        })
+    for channel in guild.channels:
+        kind = channel_kind(channel)
+        if not kind:
+            continue
+        record = {
+            "type": "channel", "kind": kind, "id": channel.id, "name": channel.name,
+            "category_id": channel.category_id, "position": channel.position,
+            "overwrites": overwrite_records(channel.overwrites)
+        }
+        if kind == "text":
+            record.update(topic=channel.topic, slowmode_delay=channel.slowmode_delay)
+        elif kind in ("voice", "stage"):
+            record.update(bitrate=channel.bitrate, user_limit=channel.user_limit)
+        elif kind == "forum":
+            record.update(
+                topic=channel.topic, slowmode_delay=channel.slowmode_delay, nsfw=channel.nsfw,
+                default_auto_archive_duration=channel.default_auto_archive_duration,
+                tags=[{"name": tag.name, "emoji": str(tag.emoji) if tag.emoji else None, "moderated": tag.moderated}
+                      for tag in forum_tags(channel)]
+            )
+        records.append(record)
+    return records
+
+def member_record(member):
+    return {
+        "type": "member", "id": member.id, "name": member.name,
+        "roles": [role.id for role in member.roles if not role.is_default()]
+    }
+
+def message_record(message):
+    record = {
+        "type": "message", "id": message.id, "content": message.content,
+        "embeds": [embed.to_dict() for embed in message.embeds],
+        "attachments": [
+            {"id": attachment.id, "url": attachment.url, "filename": attachment.filename,
+             "spoiler": attachment.is_spoiler(), "size": attachment.size}
+            for attachment in message.attachments
+        ]
+    }
+    if message.reference and message.reference.message_id:
+        record["reference"] = {"channel_id": message.reference.channel_id, "message_id": message.reference.message_id}
+    return record
+
+async def export_snapshot(source_guild, path, ignored_channel_ids):
+    writer = await asyncio.to_thread(SnapshotWriter, path)
+    message_count = 0
+    try:
+        records = structure_records(source_guild)
+        await asyncio.to_thread(writer.begin, "structure")
+        for start in range(0, len(records), SNAPSHOT_BATCH_SIZE):
+            await asyncio.to_thread(writer.write, records[start:start + SNAPSHOT_BATCH_SIZE])
+        member_count = 0
+        async for chunk in member_chunks(source_guild):
+            await asyncio.to_thread(writer.write, [member_record(member) for member in chunk])
+            member_count += len(chunk)
+        await asyncio.to_thread(writer.end)
+        log_action("Snapshot Structure", "SAVED", 
+                  f"{len(records)} structure records and {member_count} members from {source_guild.name}")
+
+        for channel in source_guild.text_channels:
+            if channel.id in ignored_channel_ids:
+                continue
+            await asyncio.to_thread(writer.begin, f"messages:{channel.id}")
+            batch = []
+            try:
+                async for message in channel.history(limit=message_history_limit, oldest_first=True):
+                    if cancel_requested():
+                        raise JobCancelled("Operation cancelled by user")
+                    batch.append(message_record(message))
+                    if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                        await asyncio.to_thread(writer.write, batch)
+                        message_count += len(batch)
+                        batch = []
+            except discord.HTTPException as e:
+                log_action("Snapshot Channel", "WARNING", f"#{channel.name}: {str(e)}", Fore.YELLOW)
+            if batch:
+                await asyncio.to_thread(writer.write, batch)
+                message_count += len(batch)
+            await asyncio.to_thread(writer.end)
+
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+    log_action("Snapshot Export", "SUCCESS", f"Path: {path}\nMessages: {message_count}", Fore.GREEN)
+    return message_count
+
+class SnapshotTarget:
+    __slots__ = ("id", "kind")
+
+    def __init__(self, id, kind):
+        self.id = id
+        self.kind = kind
+
+class SnapshotRole:
+    def __init__(self, record):
+        self.id = record["id"]
+        self.name = record["name"]
+        self.permissions = discord.Permissions(record["permissions"])
+        self.color = discord.Colour(record["color"])
+        self.hoist = record["hoist"]
+        self.mentionable = record["mentionable"]
+        self.position = record["position"]
+        self.managed = record["managed"]
+        self.default = record["default"]
+
+    def is_default(self):
+        return self.default
+
+class SnapshotAttachment:
+    def __init__(self, record):
+        self.id = record["id"]
+        self.url = record["url"]
+        self.filename = record["filename"]
+        self.size = record["size"]
+        self.spoiler = record["spoiler"]
+
+    def is_spoiler(self):
+        return self.spoiler
+
+class SnapshotMessage:
+    def __init__(self, record):
+        self.id = record["id"]
+        self.content = record["content"]
+        self.embeds = [discord.Embed.from_dict(embed) for embed in record["embeds"]]
+        self.attachments = [SnapshotAttachment(attachment) for attachment in record["attachments"]]
+        self.reference = None
+        if record.get("reference"):
+            self.reference = discord.MessageReference(
+                message_id=record["reference"]["message_id"],
+                channel_id=record["reference"]["channel_id"]
+            )
+
+class SnapshotChannel:
+    def __init__(self, record, path, offset):
+        self.kind = record["kind"]
+        self.id = record["id"]
+        self.name = record["name"]
+        self.category_id = record["category_id"]
+        self.position = record["position"]
+        self.topic = record.get("topic")
+        self.slowmode_delay = record.get("slowmode_delay", 0)
+        self.bitrate = record.get("bitrate")
+        self.user_limit = record.get("user_limit")
+        self.nsfw = record.get("nsfw", False)
+        self.default_auto_archive_duration = record.get("default_auto_archive_duration", 1440)
+        self.available_tags = [
+            discord.ForumTag(name=tag["name"], emoji=tag["emoji"], moderated=tag["moderated"])
+            for tag in record.get("tags", [])
+        ]
+        self.overwrites = {
+            SnapshotTarget(overwrite["id"], overwrite["kind"]): discord.PermissionOverwrite.from_pair(
+                discord.Permissions(overwrite["allow"]), discord.Permissions(overwrite["deny"]))
+            for overwrite in record["overwrites"]
+        }
+        self.path = path
+        self.offset = offset
+
+    async def history(self, limit=None, after=None, oldest_first=True):
+        if self.offset is None:
+            return
+        after_id = after.id if after else 0
+        f = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            records = iter_snapshot_member(f, self.offset)
+            remaining = limit
+            while remaining is None or remaining > 0:
+                size = SNAPSHOT_BATCH_SIZE if remaining is None else min(remaining, SNAPSHOT_BATCH_SIZE)
+                batch = await asyncio.to_thread(lambda: list(itertools.islice(records, size)))
+                if not batch:
+                    break
+                batch = [record for record in batch if record["id"] > after_id]
+                for record in batch:
+                    yield SnapshotMessage(record)
+                if remaining is not None:
+                    remaining -= len(batch)
+        finally:
+            f.close()
+
+class SnapshotMember:
+    def __init__(self, record, roles):
+        self.id = record["id"]
+        self.name = record["name"]
+        self.roles = [roles[role_id] for role_id in record["roles"] if role_id in roles]
+
+class SnapshotGuild:
+    def __init__(self, path, members, records):
+        self.path = path
+        self.roles = []
+        self.channels = []
+        self.members = []
+        self.emojis = []
+        self.stickers = []
+        roles = {}
+        for record in records:
+            if record["type"] == "guild":
+                self.id = record["id"]
+                self.name = record["name"]
+            elif record["type"] == "role":
+                role = roles[record["id"]] = SnapshotRole(record)
+                self.roles.append(role)
+            elif record["type"] == "channel":
+                self.channels.append(SnapshotChannel(record, path, members.get(f"messages:{record['id']}")))
+            elif record["type"] == "member":
+                self.members.append(SnapshotMember(record, roles))
+        self.roles.sort(key=lambda role: role.position)
+        self.categories = sorted(
+            (channel for channel in self.channels if channel.kind == "category"),
+            key=lambda channel: channel.position
+        )
+        self.text_channels = [channel for channel in self.channels if channel.kind == "text"]
+        self.member_index = {member.id: member for member in self.members}
+
+    def get_member(self, member_id):
+        return self.member_index.get(member_id)
+
+async def load_snapshot(path):
+    members, records = await asyncio.to_thread(read_snapshot_structure, path)
+    guild = SnapshotGuild(path, members, records)
+    log_action("Snapshot Loaded", "SUCCESS", 
+              f"Path: {path}\nGuild: {guild.name} ({guild.id})\n"
+              f"Roles: {len(guild.roles)} Channels: {len(guild.channels)} Members: {len(guild.members)}")
+    return guild
+
+def json_reply(data, status=200):
+    from aiohttp import web
+    return web.json_response(data, status=status)
+
+async def recommended_shard_count():
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(BOT_TOKEN)
+        shards, gateway = await http.get_bot_gateway()
+    finally:
+        await http.close()
+    return shards
+
+class Coordinator:
+    def __init__(self, workers, shards, port):
+        self.workers = workers
+        self.shards = shards
+        self.port = port
+        self.jobs = {}
+        self.cancelled = set()
+        self.sources = {}
+        self.processes = {}
+        self.stopping = False
+
+    def shard_ids(self, index):
+        return list(range(index, self.shards, self.workers))
+
+    def drop_worker_jobs(self, worker):
+        for job_id in [job_id for job_id, info in self.jobs.items() if info["worker"] == worker]:
+            del self.jobs[job_id]
+
+    async def sync_jobs(self, request):
+        worker = int(request.match_info["worker"])
+        data = await request.json()
+        self.drop_worker_jobs(worker)
+        for info in data["jobs"]:
+            self.jobs[info["id"]] = dict(info, worker=worker)
+        self.cancelled.intersection_update(self.jobs)
+        return json_reply({
+            "jobs": list(self.jobs.values()),
+            "cancelled": [job_id for job_id in self.cancelled if self.jobs[job_id]["worker"] == worker]
+        })
+
+    async def cancel_job(self, request):
+        job_id = request.match_info["job_id"]
+        if job_id not in self.jobs:
+            return json_reply({"error": f"No running job {job_id}"}, status=404)
+        self.cancelled.add(job_id)
+        return json_reply({"id": job_id})
+
+    async def get_source(self, request):
+        return json_reply({"guild_id": self.sources.get(request.match_info["user_id"])})
+
+    async def set_source(self, request):
+        data = await request.json()
+        self.sources[request.match_info["user_id"]] = data["guild_id"]
+        return json_reply(data)
+
+    async def supervise(self, index):
+        shard_ids = self.shard_ids(index)
+        while not self.stopping:
+            process = self.processes[index] = await asyncio.create_subprocess_exec(
+                sys.executable, os.path.abspath(__file__), "--worker", str(index), "--shards", str(self.shards),
+                "--shard-ids", ",".join(map(str, shard_ids)), "--coordinator", str(self.port),
+                "--workers", str(self.workers)
+            )
+            log_action("Worker Started", f"#{index}", f"PID: {process.pid}\nShards: {shard_ids}")
+            code = await process.wait()
+            self.drop_worker_jobs(index)
+            if self.stopping:
+                break
+            log_action("Worker Exited", f"#{index}", f"Exit code {code}, restarting in {WORKER_RESTART_DELAY:.0f}s", Fore.YELLOW)
+            await asyncio.sleep(WORKER_RESTART_DELAY)
+
+    async def run(self):
+        from aiohttp import web
+        if self.shards is None:
+            self.shards = await recommended_shard_count()
+        self.shards = max(self.shards, self.workers)
+        app = web.Application()
+        app.router.add_post("/workers/{worker}/jobs", self.sync_jobs)
+        app.router.add_post("/jobs/{job_id}/cancel", self.cancel_job)
+        app.router.add_get("/sources/{user_id}", self.get_source)
+        app.router.add_put("/sources/{user_id}", self.set_source)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, COORDINATOR_HOST, self.port).start()
+        log_action("Coordinator", "LISTENING", 
+                  f"http://{COORDINATOR_HOST}:{self.port}\nWorkers: {self.workers}\nShards: {self.shards}")
+        try:
+            await asyncio.gather(*(self.supervise(index) for index in range(self.workers)))
+        finally:
+            self.stopping = True
+            for process in self.processes.values():
+                if process.returncode is None:
+                    process.terminate()
+            await asyncio.gather(*(process.wait() for process in self.processes.values()))
+            await runner.cleanup()
+            console_writer.stop()
+
+def run_worker(index, shards, shard_ids, port, workers):
+    global worker_index, coordinator, attachment_cache
+    worker_index = index
+    attachment_cache = AttachmentCache(os.path.join(ATTACHMENT_CACHE_DIR, f"worker-{index}"))
+    load_config()
+    request_scheduler.global_rate = max(1, GLOBAL_RATE_LIMIT // workers)
+    request_scheduler.set_max_in_flight(max(1, max_in_flight // workers))
+    log_action("Worker Budget", f"#{index}", f"Global rate: {request_scheduler.global_rate}/s of {GLOBAL_RATE_LIMIT}/s\n"
+                                             f"Max in-flight requests: {request_scheduler.max_in_flight} of {max_in_flight}")
+    coordinator = CoordinatorClient(f"http://{COORDINATOR_HOST}:{port}", index)
+    build_bot(shards, shard_ids)
+    start_cpu_pool()
+    bot.run(BOT_TOKEN)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CloneBot")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--shards", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--shard-ids", type=lambda text: [int(shard_id) for shard_id in text.split(",")], help=argparse.SUPPRESS)
+    parser.add_argument("--coordinator", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workers", type=int, default=1, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.worker is not None:
+        run_worker(args.worker, args.shards, args.shard_ids, args.coordinator, args.workers)
+    else:
+        load_config()
+        if worker_processes > 1:
+            print_ascii_header()
+            try:
+                asyncio.run(Coordinator(worker_processes, shard_count, coordinator_port).run())
+            except KeyboardInterrupt:
+                pass
+        else:
+            build_bot(shard_count)
+            if shard_count != 1:
+                start_cpu_pool()
+            bot.run(BOT_TOKEN)
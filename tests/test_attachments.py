@@ -0,0 +1,74 @@
+import asyncio
+import types
+
+import main
+
+
+def make_cache(tmp_path):
+    cache = main.AttachmentCache(str(tmp_path))
+    cache.loaded = True
+    cache.session = types.SimpleNamespace(closed=False)
+
+    async def download(url):
+        if url == "bad":
+            raise RuntimeError("404")
+        if url == "slow":
+            await asyncio.sleep(60)
+        with open(cache.path(url), "wb") as f:
+            f.write(b"x")
+        cache.entries[url] = 1
+        cache.total_size += 1
+        return url
+
+    cache.download = download
+    return cache
+
+
+def attachment(attachment_id, url):
+    return types.SimpleNamespace(id=attachment_id, url=url, filename=f"{url}.png", is_spoiler=lambda: False)
+
+
+def test_failed_attachment_is_skipped(tmp_path):
+    cache = make_cache(tmp_path)
+    attachments = [attachment(1, "good"), attachment(2, "bad")]
+
+    async def scenario():
+        return await cache.prefetch(attachments)
+
+    digests = asyncio.run(scenario())
+    assert digests == ["good", None]
+    files = cache.to_files(attachments, digests)
+    assert [f.filename for f in files] == ["good.png"]
+    for f in files:
+        f.close()
+    for digest in digests:
+        if digest:
+            cache.release(digest)
+    assert not cache.pins
+
+
+def test_cancelled_prefetch_releases_pins(tmp_path):
+    cache = make_cache(tmp_path)
+
+    async def scenario():
+        prefetch = cache.prefetch([attachment(1, "good"), attachment(2, "slow")])
+        await asyncio.sleep(0.05)
+        assert cache.pins["good"] == 1
+        cache.discard(prefetch)
+        await asyncio.gather(prefetch, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert not cache.pins
+
+
+def test_index_is_saved_while_a_channel_is_still_copying(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "CHECKPOINT_FLUSH_INTERVAL", 0.05)
+    cache = make_cache(tmp_path)
+
+    async def scenario():
+        digests = await cache.prefetch([attachment(1, "good")])
+        await asyncio.sleep(0.3)
+        return digests
+
+    asyncio.run(scenario())
+    assert main.load_attachment_cache(str(tmp_path), cache.index_path)[1] == {"1": "good"}
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import main
+
+
+def test_compact_keeps_records_appended_during_flush(tmp_path, monkeypatch):
+    write_records = main.write_checkpoint_records
+
+    def slow_write(path, records):
+        time.sleep(0.2)
+        write_records(path, records)
+
+    monkeypatch.setattr(main, "write_checkpoint_records", slow_write)
+
+    async def scenario():
+        journal = main.CheckpointJournal(str(tmp_path / "progress.jsonl"))
+        progress = main.CloneProgress(10, journal)
+        progress.complete("roles", 1)
+        flush = asyncio.ensure_future(journal.flush())
+        await asyncio.sleep(0.05)
+        checkpoint = asyncio.ensure_future(progress.checkpoint())
+        await asyncio.sleep(0)
+        progress.complete("channels", 2)
+        progress.map_message(3, 30, 300)
+        await asyncio.gather(flush, checkpoint)
+        await journal.flush()
+        return journal.path
+
+    state = main.replay_checkpoint_journal(asyncio.run(scenario()))
+    assert state["completed_roles"] == [1]
+    assert state["completed_channels"] == [2]
+    assert state["message_cursors"]["3"] == [30, 1]
+
+
+def test_idle_journal_flushes_on_timer(tmp_path):
+    async def scenario():
+        journal = main.CheckpointJournal(str(tmp_path / "progress.jsonl"), flush_interval=0.05)
+        progress = main.CloneProgress(10, journal)
+        progress.map_message(3, 30, 300)
+        await asyncio.sleep(0.3)
+        return journal.path
+
+    state = main.replay_checkpoint_journal(asyncio.run(scenario()))
+    assert state["message_cursors"]["3"] == [30, 1]
@@ -0,0 +1,19 @@
+import types
+
+import discord
+
+import main
+
+
+def test_created_roles_translate_before_they_are_cached():
+    record = {"kind": "text", "id": 10, "name": "general", "category_id": None, "position": 0,
+              "overwrites": [{"id": 1, "kind": "role", "allow": 1024, "deny": 0}]}
+    channel = main.SnapshotChannel(record, None, None)
+    source = types.SimpleNamespace(channels=[channel])
+    target = types.SimpleNamespace(name="target", get_role=lambda role_id: None, get_member=lambda member_id: None)
+    new_role = discord.Object(id=100, type=discord.Role)
+
+    translation = main.OverwriteTranslation(source, target, {1: 100}, [new_role])
+    translated = translation.translate(channel.overwrites)
+    assert list(translated) == [new_role]
+    assert translated[new_role].pair()[0] == discord.Permissions(1024)
@@ -0,0 +1,20 @@
+import types
+
+import main
+
+
+def role(role_id, position, default=False):
+    return types.SimpleNamespace(id=role_id, position=position, managed=False, is_default=lambda: default)
+
+
+def test_uncached_cloned_roles_are_positioned():
+    source = types.SimpleNamespace(roles=[role(1, 0, True), role(2, 1), role(3, 2)])
+    cached = {20: role(20, 1)}
+    top = role(99, 5)
+    target = types.SimpleNamespace(
+        roles=[role(10, 0, True), *cached.values(), top],
+        me=types.SimpleNamespace(top_role=top),
+        get_role=cached.get
+    )
+
+    assert main.role_positions(source, target, {2: 20, 3: 30}) == {20: 1, 30: 2}
@@ -0,0 +1,20 @@
+import asyncio
+
+import main
+
+
+def test_finished_bars_leave_the_frame(monkeypatch):
+    renderer = main.ProgressRenderer(True)
+    monkeypatch.setattr(main, "progress_renderer", renderer)
+
+    async def scenario():
+        main.print_progress_bar(10, 500, prefix='Cloning Messages in general:', suffix='10 messages')
+        main.print_progress_bar(3, 7, prefix='Cloning Channels:', suffix='general')
+        main.finish_progress_bar('Cloning Messages in general:')
+        main.finish_progress_bar('Cloning Channels:')
+        await asyncio.sleep(main.RENDER_INTERVAL * 3)
+        return renderer.render(), renderer.task.done()
+
+    frame, idle = asyncio.run(scenario())
+    assert frame == []
+    assert idle
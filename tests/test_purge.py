@@ -0,0 +1,55 @@
+import asyncio
+import types
+
+import main
+
+
+class FakeMessage:
+    def __init__(self):
+        self.id = 555
+        self.embeds = []
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def edit(self, embed):
+        self.embeds.append(embed)
+
+
+def test_purge_confirms_under_lean_profile(monkeypatch):
+    monkeypatch.setattr(main, "cache_profile", "lean")
+    monkeypatch.setattr(main, "bot", None)
+    bot = main.build_bot()
+    purged = []
+
+    async def purge_guild(guild, channels, roles, counts, total_items):
+        purged.append(guild)
+
+    monkeypatch.setattr(main, "purge_guild", purge_guild)
+    monkeypatch.setattr(main, "send_webhook_update", lambda *args, **kwargs: None)
+    message = FakeMessage()
+    guild = types.SimpleNamespace(name="target", channels=[], roles=[], me=types.SimpleNamespace(top_role=None))
+
+    async def send_message(embed):
+        pass
+
+    async def original_response():
+        return message
+
+    interaction = types.SimpleNamespace(
+        guild=guild, channel=object(), user=types.SimpleNamespace(id=42),
+        response=types.SimpleNamespace(send_message=send_message), original_response=original_response
+    )
+
+    async def scenario():
+        bot.loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(main.purge.callback(interaction))
+        await asyncio.sleep(0.05)
+        bot.dispatch("raw_reaction_add", types.SimpleNamespace(message_id=555, user_id=7, emoji="✅"))
+        bot.dispatch("raw_reaction_add", types.SimpleNamespace(message_id=555, user_id=42, emoji="✅"))
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert bot._connection.max_messages is None
+    assert purged == [guild]
+    assert message.embeds[-1].title == "✅ Purge Complete"
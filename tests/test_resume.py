@@ -0,0 +1,38 @@
+import asyncio
+import types
+
+import main
+
+
+def voice_channel(channel_id, name, position):
+    record = {"kind": "voice", "id": channel_id, "name": name, "category_id": None,
+              "position": position, "overwrites": []}
+    return main.SnapshotChannel(record, None, None)
+
+
+def guild(guild_id, channels):
+    by_id = {channel.id: channel for channel in channels}
+    return types.SimpleNamespace(
+        id=guild_id, name=str(guild_id), roles=[], categories=[], channels=channels, me=None,
+        get_channel=by_id.get, get_role=lambda role_id: None, get_member=lambda member_id: None
+    )
+
+
+def test_resume_maps_duplicate_names_to_their_own_targets(tmp_path):
+    source = guild(1, [voice_channel(10, "general", 0), voice_channel(20, "general", 1)])
+    target = guild(2, [voice_channel(11, "general", 0), voice_channel(21, "general", 1)])
+
+    async def scenario():
+        journal = main.CheckpointJournal(str(tmp_path / "progress.jsonl"))
+        progress = main.CloneProgress(2, journal)
+        for source_id, target_id in ((10, 11), (20, 21)):
+            progress.map_channel(source_id, target_id)
+            progress.complete("channels", source_id)
+        await journal.flush()
+
+        resumed = main.CloneProgress(2, main.CheckpointJournal(journal.path))
+        resumed.load(main.replay_checkpoint_journal(journal.path))
+        return await main.clone_structure(source, target, resumed, set())
+
+    role_mapping, channel_mapping, channel_pairs = asyncio.run(scenario())
+    assert channel_mapping == {10: 11, 20: 21}
@@ -0,0 +1,72 @@
+import asyncio
+
+import discord
+
+import main
+
+
+def message(message_id, reply_to=None):
+    record = {"type": "message", "id": message_id, "content": f"message {message_id}",
+              "embeds": [{"title": "embed"}] if message_id == 1002 else [], "attachments": []}
+    if message_id == 1003:
+        record["attachments"].append({"id": 5, "url": "https://cdn/file.png", "filename": "file.png",
+                                      "spoiler": True, "size": 10})
+    if reply_to:
+        record["reference"] = {"channel_id": 20, "message_id": reply_to}
+    return record
+
+
+def write_snapshot(path):
+    writer = main.SnapshotWriter(path)
+    writer.begin("structure")
+    writer.write([
+        {"type": "guild", "id": 1, "name": "source"},
+        {"type": "role", "id": 1, "name": "@everyone", "permissions": 0, "color": 0, "hoist": False,
+         "mentionable": False, "position": 0, "managed": False, "default": True},
+        {"type": "role", "id": 2, "name": "mods", "permissions": 8, "color": 255, "hoist": True,
+         "mentionable": True, "position": 1, "managed": False, "default": False},
+        {"type": "channel", "kind": "category", "id": 10, "name": "info", "category_id": None,
+         "position": 0, "overwrites": []},
+        {"type": "channel", "kind": "text", "id": 20, "name": "general", "category_id": 10, "position": 1,
+         "topic": "hello", "slowmode_delay": 5,
+         "overwrites": [{"id": 2, "kind": "role", "allow": 1024, "deny": 2048}]},
+        {"type": "member", "id": 30, "name": "alice", "roles": [2]},
+    ])
+    writer.end()
+    writer.begin("messages:20")
+    messages = [message(1001), message(1002), message(1003, reply_to=1001), message(1004), message(1005)]
+    writer.write(messages[:3])
+    writer.write(messages[3:])
+    writer.end()
+    writer.close()
+
+
+def test_snapshot_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "SNAPSHOT_BATCH_SIZE", 2)
+    path = str(tmp_path / "source.cbsnap")
+    write_snapshot(path)
+
+    async def scenario():
+        guild = await main.load_snapshot(path)
+        general = next(channel for channel in guild.channels if channel.name == "general")
+        everything = [message async for message in general.history()]
+        resumed = [message async for message in general.history(after=discord.Object(id=1002))]
+        limited = [message async for message in general.history(limit=3, after=discord.Object(id=1001))]
+        return guild, general, everything, resumed, limited
+
+    guild, general, everything, resumed, limited = asyncio.run(scenario())
+    assert (guild.id, guild.name) == (1, "source")
+    assert [role.name for role in guild.roles] == ["@everyone", "mods"]
+    assert [category.name for category in guild.categories] == ["info"]
+    assert (general.kind, general.category_id, general.topic, general.slowmode_delay) == ("text", 10, "hello", 5)
+    [(target, overwrite)] = general.overwrites.items()
+    assert (target.id, target.kind) == (2, "role")
+    assert [permissions.value for permissions in overwrite.pair()] == [1024, 2048]
+    assert [(member.id, [role.name for role in member.roles]) for member in guild.members] == [(30, ["mods"])]
+
+    assert [message.id for message in everything] == [1001, 1002, 1003, 1004, 1005]
+    assert everything[1].embeds[0].title == "embed"
+    assert (everything[2].attachments[0].filename, everything[2].attachments[0].is_spoiler()) == ("file.png", True)
+    assert everything[2].reference.message_id == 1001
+    assert [message.id for message in resumed] == [1003, 1004, 1005]
+    assert [message.id for message in limited] == [1002, 1003, 1004]